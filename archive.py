@@ -0,0 +1,138 @@
+# Parallel decoding of archived .ubx captures.
+# Files are split into shards at UBX frame boundaries, every shard is parsed and
+# decoded in a worker process, and the per-shard tallies are merged in file and
+# offset order, so the result is the same as decoding the files serially.
+#
+# Beacon tally: beacon key -> [first pos, last pos, count, last svId, first svId,
+#                              first message bits, first params bits]
+# DCR tally:    report id -> [first pos, last pos, count, last svId, {svId: count},
+#                            {payload: (first pos, bits, row)}]
+# where pos is (file index, byte offset of the frame), payload is
+# dcr_decode.dcr_payload() of a distinct message and its row holds svId,
+# PRIORITY, CATEGORY, REPORT TIME, INFO TYPE, INFO. Repeats are only counted.
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dcr_decode import dcr_payload
+from decoder import DCREvent, RLMEvent, decode_message
+from ubxframe import SYNC, UBXFramer, ubx_checksum
+
+MIN_SHARD = 1 << 20
+SYNC_WINDOW = 1 << 16
+
+
+def frame_at(buf, pos):
+    # length of a valid UBX frame starting at pos, 0 if there is none
+    if buf[pos:pos + 2] != SYNC or pos + 8 > len(buf):
+        return 0
+    end = pos + 8 + int.from_bytes(buf[pos + 4:pos + 6], 'little')
+    if end > len(buf) or ubx_checksum(buf[pos + 2:end - 2]) != buf[end - 2:end]:
+        return 0
+    return end - pos
+
+def find_sync(f, pos, size):
+    # first offset >= pos where a valid frame starts and is followed by another
+    # sync word (or the end of the file), size if there is none
+    while pos < size:
+        f.seek(pos)
+        buf = f.read(SYNC_WINDOW + 2 * 65544)
+        i = buf.find(SYNC)
+        while 0 <= i < SYNC_WINDOW:
+            n = frame_at(buf, i)
+            if n and (pos + i + n >= size or buf[i + n:i + n + 2] == SYNC):
+                return pos + i
+            i = buf.find(SYNC, i + 1)
+        pos += SYNC_WINDOW
+    return size
+
+def plan_shards(files, jobs, min_shard=MIN_SHARD):
+    total = sum(os.path.getsize(path) for path in files)
+    target = max(min_shard, total // (jobs * 4) + 1)
+    shards = []
+    for index, path in enumerate(files):
+        size = os.path.getsize(path)
+        cuts = [0]
+        with open(path, 'rb') as f:
+            for nominal in range(target, size, target):
+                cut = find_sync(f, max(nominal, cuts[-1] + 1), size)
+                if cut < size:
+                    cuts.append(cut)
+        cuts.append(size)
+        shards += [(index, path, start, end) for start, end in zip(cuts, cuts[1:]) if end > start]
+    return shards
+
+
+def decode_shard(shard):
+    index, path, start, end = shard
+    beacons = {}
+    dcrs = {}
+    counts = {}
+    with open(path, 'rb') as f:
+        f.seek(start)
+        stream = io.BytesIO(f.read(end - start))
+    framer = UBXFramer(stream)
+    for (raw_data, parsed_data) in framer:
+        pos = (index, start + framer.offset)
+        identity = parsed_data.identity
+        counts[identity] = counts.get(identity, 0) + 1
+        event = decode_message(parsed_data)
+        if isinstance(event, RLMEvent):
+            tally = beacons.get(event.key)
+            if tally is None:
+                beacons[event.key] = [pos, pos, 1, event.svid, event.svid,
+                                      bin(event.message)[2:].zfill(4), event.params]
+            else:
+                tally[1] = pos
+                tally[2] += 1
+                tally[3] = event.svid
+        elif isinstance(event, DCREvent):     # the framer only passes DCR subframes
+            tally = dcrs.get(event.key)
+            if tally is None:
+                tally = dcrs[event.key] = [pos, pos, 0, event.svid, {}, {}]
+            tally[1] = pos
+            tally[2] += 1
+            tally[3] = event.svid
+            tally[4][event.svid] = tally[4].get(event.svid, 0) + 1
+            payload = dcr_payload(event.bits)
+            if payload not in tally[5]:
+                tally[5][payload] = (pos, event.bits, [str(event.svid)] + event.columns())
+    return beacons, dcrs, counts
+
+def merge(results):
+    # results must be in shard order; dict order stays first-seen order
+    beacons = {}
+    dcrs = {}
+    counts = {}
+    for shard_beacons, shard_dcrs, shard_counts in results:
+        for key, tally in shard_beacons.items():
+            merged = beacons.get(key)
+            if merged is None:
+                beacons[key] = list(tally)
+            else:
+                merged[1] = tally[1]
+                merged[2] += tally[2]
+                merged[3] = tally[3]
+        for key, tally in shard_dcrs.items():
+            merged = dcrs.get(key)
+            if merged is None:
+                dcrs[key] = list(tally)
+            else:
+                merged[1] = tally[1]
+                merged[2] += tally[2]
+                merged[3] = tally[3]
+                for svid, n in tally[4].items():
+                    merged[4][svid] = merged[4].get(svid, 0) + n
+                for payload, message in tally[5].items():
+                    merged[5].setdefault(payload, message)
+        for identity, count in shard_counts.items():
+            counts[identity] = counts.get(identity, 0) + count
+    return beacons, dcrs, counts
+
+def decode_archive(files, jobs=None, min_shard=MIN_SHARD):
+    jobs = jobs or os.cpu_count()
+    if jobs == 1:
+        shards = [(index, path, 0, os.path.getsize(path)) for index, path in enumerate(files)]
+        return merge(map(decode_shard, shards))
+    shards = plan_shards(files, jobs, min_shard)
+    with ProcessPoolExecutor(jobs) as pool:
+        return merge(pool.map(decode_shard, shards))
@@ -0,0 +1,116 @@
+# COSPAS-SARSAT beacon HEXID classification.
+# The 15-hex-digit (60 bit) HEXID is parsed into an int once; the country code
+# and the protocol bits are taken with shifts and masks. Beacon types come from
+# a table precomputed for every protocol flag + protocol code combination, and
+# results are memoized per HEXID. The country table is read from country.csv
+# next to this module, on the first lookup unless load_countries() was called
+# before, and kept pickled in __pycache__ until the CSV changes.
+import os
+from functools import lru_cache
+
+COUNTRY_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'country.csv')
+
+countries = {}
+
+# user protocols (flag 1), bits 11-13 of the HEXID
+USER_TYPES = {0b000: 'ORB', 0b001: 'ELT', 0b010: 'EPIRB', 0b100: 'NUP',
+              0b101: 'SGB', 0b110: 'EPIRB', 0b111: 'TEST'}
+# serial user protocol (011), bits 14-16
+USER_SERIAL_TYPES = {0b000: 'ELT', 0b001: 'ELT', 0b011: 'ELT', 0b010: 'EPIRB',
+                     0b100: 'EPIRB', 0b110: 'PLB'}
+# standard/national location protocols (flag 0), bits 11-14
+STD_TYPES = {0b0010: 'EPIRB', 0b1010: 'EPIRB', 0b0110: 'EPIRB',
+             0b0011: 'ELT', 0b0100: 'ELT', 0b0101: 'ELT', 0b1000: 'ELT', 0b1001: 'ELT',
+             0b0111: 'PLB', 0b1011: 'PLB', 0b1100: 'ShipSec', 0b1110: 'TEST', 0b1111: 'TEST'}
+# RLS location protocol (1101), indexed by bits 15-16
+RLS_TYPES = ('RLS/ELT', 'RLS/EPIRB', 'RLS/PLB', 'RLS/TEST')
+RLS_TEST_TYPES = ('RLS/1st EPIRB', 'RLS/2nd EPIRB', 'RLS/PLB EPIRB', 'RLS/TEST EPIRB')
+
+
+def protocol_type(key):
+    # key: protocol flag followed by HEXID bits 11-20
+    bits = key & 0x3FF
+    if key >> 10:
+        code = bits >> 7
+        if code == 0b011:
+            return USER_SERIAL_TYPES.get((bits >> 4) & 0b111, 'UNDEF')
+        return USER_TYPES.get(code, 'UNDEF')
+    code = bits >> 6
+    if code == 0b1101:
+        rls = RLS_TEST_TYPES if bits & 0b1111 == 0b1111 else RLS_TYPES
+        return rls[(bits >> 4) & 0b11]
+    return STD_TYPES.get(code, 'UNDEF')
+
+TYPE_TABLE = tuple(protocol_type(key) for key in range(2048))
+
+
+def read_countries(path):
+    import csv
+    with open(path) as f:
+        return {int(rows['Code']): rows['Country'] for rows in csv.DictReader(f, delimiter=';')}
+
+def country_cache(path):
+    return os.path.join(os.path.dirname(path), '__pycache__', os.path.basename(path) + '.pickle')
+
+def load_countries(path=COUNTRY_CSV):
+    import pickle
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    cache = country_cache(path)
+    try:
+        with open(cache, 'rb') as f:
+            cached, table = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+        cached = None
+    if cached != stamp:
+        table = read_countries(path)
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            tmp = f'{cache}.{os.getpid()}'
+            with open(tmp, 'wb') as f:
+                pickle.dump((stamp, table), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache)
+        except OSError:     # read-only install, parse the CSV every time
+            pass
+    countries.clear()
+    countries.update(table)
+    beacon_info.cache_clear()
+
+def type_key(v):
+    # HEXID (int) -> index into TYPE_TABLE
+    return ((v >> 49) & 0x400) | ((v >> 39) & 0x3FF)
+
+def country_code(v):
+    return (v >> 49) & 0x3FF
+
+def country_name(code):
+    if not countries:
+        load_countries()
+    return countries.get(code, 'UNKNOWN')
+
+@lru_cache(maxsize=65536)
+def beacon_info(beacon):
+    v = int(beacon, 16)
+    return TYPE_TABLE[type_key(v)], country_name(country_code(v))
+
+def beacon_key(beacon):
+    # bits 4-7 of the beacon field are not part of the HEXID
+    return beacon & ~0xF0
+
+def beacon_value(beacon):
+    # RXM-RLM beacon field -> HEXID as an int, int(beacon_hexid(beacon), 16)
+    return int.from_bytes(beacon.to_bytes(8, 'little'), 'big') & ((1 << 60) - 1)
+
+def beacon_hexid(beacon):
+    # RXM-RLM beacon field (U8, little endian) -> 15 hex digit HEXID
+    return beacon.to_bytes(8, 'little').hex()[1:]
+
+def hexid_beacon(hexid):
+    # inverse of beacon_hexid for a beacon_key
+    return int.from_bytes(bytes.fromhex('0' + hexid), 'little')
+
+def beacon_type(beacon):
+    return beacon_info(beacon)[0]
+
+def country_decode(beacon):
+    return beacon_info(beacon)[1]
@@ -0,0 +1,108 @@
+# Scaling of the parallel archive decoder over 1..N worker processes.
+# Builds a synthetic capture and first checks that `--replay --jobs 2` writes
+# the same RLM/DCR logs (time columns aside) and ends with the same tables as
+# a serial --replay through process_message(), also with --max_rows; then checks
+# that every sharded decode_archive() run merges to the serial result and
+# prints the throughput per job count.
+#   python benchmarks/bench_archive.py [messages]
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from pyubx2 import UBXMessage, GET
+from archive import decode_archive
+
+SHARD = 256 * 1024
+CHECK_MESSAGES = 20000
+# runs gnss_addinfo_decoder.main() and prints the live tables as JSON
+REPLAY = '''
+import json, sys
+import gnss_addinfo_decoder as g
+g.main(sys.argv[1:])
+print(json.dumps([[[row.key, row.svid, row.count] for row in g.tab],
+                  [[row.key, row.svid, row.count, sorted(row.sats.items()), len(row.parts)] for row in g.dcr_tab]]))
+'''
+
+
+def frames():
+    out = []
+    for i in range(300):
+        out.append(UBXMessage('RXM', 'RXM-RLM', GET, version=0, type=1, svId=random.randint(1, 36),
+                              beacon=random.getrandbits(60) << 4, message=1, params=random.getrandbits(16)).serialize())
+    for i in range(300):
+        dwords = {f'dwrd_{k+1:02}': random.getrandbits(32) for k in range(8)}
+        dwords['dwrd_01'] = 0x9AAC0000 | random.getrandbits(16)     # DCR, message type 43
+        out.append(UBXMessage('RXM', 'RXM-SFRBX', GET, gnssId=5, svId=random.randint(193, 199), sigId=1, freqId=0,
+                              numWords=8, chn=1, version=2, **dwords).serialize())
+    for i in range(300):
+        dwords = {f'dwrd_{k+1:02}': random.getrandbits(32) for k in range(10)}
+        out.append(UBXMessage('RXM', 'RXM-SFRBX', GET, gnssId=random.choice((0, 2)), svId=random.randint(1, 36), sigId=0,
+                              freqId=0, numWords=10, chn=1, version=2, **dwords).serialize())
+    return out
+
+def write_capture(path, n):
+    pool = frames()
+    with open(path, 'wb') as f:
+        for i in range(n):
+            f.write(random.choice(pool))
+            if i % 5000 == 0:
+                # line noise (without NMEA/RTCM/UBX lead bytes), the shards must resync past it
+                f.write(bytes(random.randrange(0x25, 0xb5) for _ in range(37)))
+
+def log_rows(path, time_column):
+    with open(path, newline='') as f:
+        return [row[:time_column] + row[time_column + 1:] for row in csv.reader(f, delimiter=';')]
+
+def replay(files, tmp, *options):
+    # -> (tables, RLM log, DCR log) of gnss_addinfo_decoder.py --replay, without the time columns
+    rlm = os.path.join(tmp, 'RLM_log.csv')
+    dcr = os.path.join(tmp, 'DCR_log.csv')
+    for path in (rlm, dcr):
+        if os.path.exists(path):
+            os.remove(path)
+    out = subprocess.run([sys.executable, '-c', REPLAY, '--replay', *files, '--out_rlm_file', rlm, '--out_dcr_file', dcr,
+                          *options], capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout.splitlines()[-1]), log_rows(rlm, 4), log_rows(dcr, 0)
+
+def check_replay(files, tmp):
+    for options in ((), ('--max_rows', '5')):
+        serial = replay(files, tmp, '--jobs', '1', *options)
+        parallel = replay(files, tmp, '--jobs', '2', *options)
+        name = ' '.join(('--replay --jobs 2',) + options)
+        if parallel != serial:
+            sys.exit(f'{name}: logs or tables differ from the serial run')
+        print(f'{name}: same as serial, {len(serial[1]) - 1} RLM and {len(serial[2]) - 1} DCR log rows, '
+              f'{len(serial[0][0])} beacons and {len(serial[0][1])} reports')
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [os.path.join(tmp, f'cap{i}.ubx') for i in range(2)]
+        for path in files:
+            write_capture(path, n // len(files))
+        size = sum(os.path.getsize(path) for path in files)
+        check = os.path.join(tmp, 'check.ubx')
+        write_capture(check, CHECK_MESSAGES)
+        check_replay([check], tmp)
+        print(f'{n} messages, {size / 1e6:.1f} MB, {os.cpu_count()} cores')
+        start = time.perf_counter()
+        serial = decode_archive(files, 1)
+        t_serial = time.perf_counter() - start
+        print(f'{"jobs":>4} {"msg/s":>10} {"speedup":>8}')
+        print(f'{1:>4} {n / t_serial:>10.0f} {1:>8.2f}')
+        for jobs in range(2, max(2, os.cpu_count()) + 1):
+            start = time.perf_counter()
+            result = decode_archive(files, jobs, min_shard=SHARD)
+            elapsed = time.perf_counter() - start
+            if result != serial:
+                sys.exit(f'{jobs} jobs: merged result differs from the serial run')
+            print(f'{jobs:>4} {n / elapsed:>10.0f} {t_serial / elapsed:>8.2f}')
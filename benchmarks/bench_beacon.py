@@ -0,0 +1,42 @@
+# HEXID classification: integer/lookup-table decoder vs. the original string
+# slicing functions (kept in tests/test_beacon_decode.py, which checks that
+# both give the same output) on a random HEXID corpus.
+#   python benchmarks/bench_beacon.py
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+import beacon_decode
+from test_beacon_decode import legacy_beacon_type, legacy_country_decode
+
+N = 200000
+
+
+def timed(fn, corpus):
+    start = time.perf_counter()
+    for hexid in corpus:
+        fn(hexid)
+    return (time.perf_counter() - start) / len(corpus) * 1e9
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    beacon_decode.load_countries(os.path.join(ROOT, 'country.csv'))
+    countrydict = {str(code): name for code, name in beacon_decode.countries.items()}
+    corpus = [f'{random.getrandbits(60):015x}' for _ in range(N)]
+    # every protocol flag/code combination at least once
+    corpus += [f'{(flag << 59) | (code << 39) | random.getrandbits(39):015x}' for flag in (0, 1) for code in range(1024)]
+
+    t_legacy = timed(lambda h: (legacy_beacon_type(h), legacy_country_decode(h, countrydict)), corpus)
+    beacon_decode.beacon_info.cache_clear()
+    t_cold = timed(beacon_decode.beacon_info, corpus)
+    # repeated HEXIDs, as in a live feed where a few beacons repeat all day
+    repeated = [random.choice(corpus[:5000]) for _ in range(N)]
+    t_warm = timed(beacon_decode.beacon_info, repeated)
+    print(f'string slicing (type + country): {t_legacy:8.0f} ns/HEXID')
+    print(f'int/table, uncached:             {t_cold:8.0f} ns/HEXID')
+    print(f'int/table, LRU hit:              {t_warm:8.0f} ns/HEXID')
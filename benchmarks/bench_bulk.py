@@ -0,0 +1,78 @@
+# Columnar bulk decoding (bulk.py, numpy) against the per-message decoder on a
+# generated capture. Every RLM type/country and every DCR header and fixed
+# field of the bulk result is first checked against beacon_info() and
+# decode_dcr().
+#   python benchmarks/bench_bulk.py [seconds of traffic]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from bulk import load
+except ImportError as e:
+    sys.exit(f'bulk.py needs numpy: {e}')
+from decoder import DCREvent, RLMEvent, iter_events
+from dcr_decode import DCR_LAYOUTS
+from ubxgen import Traffic
+
+HEADER = ('msg_type', 'priority', 'category', 'month', 'day', 'hour', 'minute', 'info_type')
+DCX_HEADER = ('msg_type', 'priority', 'org_code')
+
+
+def scalar(path):
+    # per-message path: pyubx2 parse, beacon_info() and decode_dcr() for every message
+    rlm = []
+    dcr = []
+    with open(path, 'rb') as f:
+        for event in iter_events(f):
+            if isinstance(event, RLMEvent):
+                rlm.append((event.svid, int(event.hexid, 16), event.type, event.country))
+            elif isinstance(event, DCREvent):
+                dcr.append((event.svid, event.key, event.record))
+    return rlm, dcr
+
+def check(rlm, dcr, fields, want_rlm, want_dcr):
+    if len(rlm) != len(want_rlm) or len(dcr) != len(want_dcr):
+        sys.exit(f'row counts differ: {len(rlm)}/{len(want_rlm)} RLM, {len(dcr)}/{len(want_dcr)} DCR')
+    for row, want in zip(rlm.tolist(), want_rlm):
+        got = (row[2], row[4], row[7], row[8])      # svid, hexid, type, country
+        if got != want:
+            sys.exit(f'RLM mismatch: {got} != {want}')
+    for i, (svid, key, record) in enumerate(want_dcr):
+        names = DCX_HEADER if record['msg_type'] == 44 else HEADER
+        got = {name: int(dcr[i][name]) for name in names}
+        if (int(dcr[i]['svid']), int(dcr[i]['report'])) != (svid, key) or any(got[name] != record[name] for name in names):
+            sys.exit(f'DCR header mismatch at {i}: {got} != {record}')
+    checked = 0
+    for category, table in fields.items():
+        for row in table:
+            record = want_dcr[row['index']][2]
+            for name in table.dtype.names[1:]:
+                if int(row[name]) != record[name]:
+                    sys.exit(f'category {category} field {name} mismatch: {row[name]} != {record[name]}')
+                checked += 1
+    return checked
+
+
+if __name__ == '__main__':
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 3600
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'traffic.ubx')
+        with open(path, 'wb') as f:
+            for frame in Traffic(0, reports=2000, rlm_per_min=600, dcr_share=0.6).frames(seconds):
+                f.write(frame)
+        print(f'{seconds} s of traffic, {os.path.getsize(path) / 1e6:.1f} MB')
+        start = time.perf_counter()
+        want_rlm, want_dcr = scalar(path)
+        t_scalar = time.perf_counter() - start
+        start = time.perf_counter()
+        rlm, dcr, fields = load(path)
+        t_bulk = time.perf_counter() - start
+        n = len(want_rlm) + len(want_dcr)
+        checked = check(rlm, dcr, fields, want_rlm, want_dcr)
+        print(f'{len(rlm)} RLM and {len(dcr)} DCR rows match, {checked} fixed fields of '
+              f'{sum(len(t) for t in fields.values())} reports in {len(DCR_LAYOUTS)} categories')
+        print(f'per message: {n / t_scalar:10.0f} msg/s ({t_scalar:.2f} s)')
+        print(f'bulk:        {n / t_bulk:10.0f} msg/s ({t_bulk:.2f} s), {t_scalar / t_bulk:.1f}x')
@@ -0,0 +1,72 @@
+# DC Report decoding throughput (the decoder is checked against the original
+# BitArray rows in tests/test_dcr_decode.py). The repeated broadcast run
+# compares decoding every copy with Report.merge(), which decodes each message
+# once.
+#   python benchmarks/bench_dcr.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dcr_decode import dcr_bits, dcr_id, decode_dcr, format_dcr
+from tables import NEW, REPEAT, STALE, Report
+
+N = 50000
+COPIES = 20         # broadcasts of each report, over all satellites
+PREAMBLES = (0x53, 0x9A, 0xC6)
+
+
+def payloads(n):
+    out = []
+    for i in range(n):
+        v = random.getrandbits(256)
+        v = (v & ~(0x3F << 242 | 0xF << 235)) | 43 << 242 | (i % 16) << 235
+        out.append([(v >> (32 * (7 - k))) & 0xFFFFFFFF for k in range(8)])
+    return out
+
+def broadcasts(dwords, copies):
+    # every report again and again, with the rotating preamble, interleaved
+    reports = [dcr_bits(d) for d in dwords]
+    return [v & ~(0xFF << 248) | PREAMBLES[i % 3] << 248 for i in range(copies) for v in reports]
+
+def decode_all(stream):
+    for v in stream:
+        format_dcr(decode_dcr(v))
+    return len(stream)
+
+def decode_once(stream):
+    rows = {}
+    decoded = 0
+    for v in stream:
+        key = dcr_id(v)
+        row = rows.get(key)
+        if row is None:
+            rows[key] = Report(key, v, 193, 0)
+            change = NEW
+        else:
+            change = row.merge(v)
+        if change not in (REPEAT, STALE):
+            format_dcr(decode_dcr(v))
+            decoded += 1
+    return decoded
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    dwords = payloads(N)
+    start = time.perf_counter()
+    records = [decode_dcr(dcr_bits(d)) for d in dwords]
+    t_decode = time.perf_counter() - start
+    start = time.perf_counter()
+    for r in records:
+        format_dcr(r)
+    t_format = time.perf_counter() - start
+    print(f'decode: {N / t_decode:10.0f} reports/s ({t_decode / N * 1e6:.1f} us)')
+    print(f'format: {N / t_format:10.0f} reports/s ({t_format / N * 1e6:.1f} us)')
+    stream = broadcasts(dwords[:N // COPIES], COPIES)
+    for name, fn in (('decode every copy', decode_all), ('decode once', decode_once)):
+        start = time.perf_counter()
+        decoded = fn(stream)
+        elapsed = time.perf_counter() - start
+        print(f'{name + ":":<18} {len(stream) / elapsed:10.0f} messages/s ({elapsed / len(stream) * 1e6:.1f} us), {decoded} decoded')
@@ -0,0 +1,56 @@
+# CPU time of the pre-filtering framer vs. full pyubx2 parsing of every frame
+# on a mixed capture shaped like a receiver's normal output (mostly GPS/Galileo
+# subframes, QZSS L1S of which few are DC Reports, NAV-SAT, rare RLMs), the
+# cost of collecting metrics in the framer and of decoding the frames into
+# events with decoder.iter_events.
+#   python benchmarks/bench_framer.py [epochs]
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyubx2 import UBXReader
+from dcr_decode import is_dcr_frame
+from decoder import iter_events
+from metrics import Metrics
+from ubxframe import UBXFramer
+from ubxgen import Traffic
+
+
+def full_parse(data):
+    kept = []
+    for (raw_data, parsed_data) in UBXReader(io.BytesIO(data), protfilter=2):
+        if parsed_data.identity in ('RXM-RLM', 'NAV-SAT') or (parsed_data.identity == 'RXM-SFRBX' and is_dcr_frame(parsed_data)):
+            kept.append(raw_data)
+    return kept
+
+def framed(data, metrics=None):
+    return [raw_data for (raw_data, parsed_data) in UBXFramer(io.BytesIO(data), metrics=metrics)]
+
+
+if __name__ == '__main__':
+    frames = list(Traffic(0).frames(int(sys.argv[1]) if len(sys.argv) > 1 else 3600))
+    data, n = b''.join(frames), len(frames)
+    start = time.process_time()
+    expected = full_parse(data)
+    t_full = time.process_time() - start
+    start = time.process_time()
+    kept = framed(data)
+    t_framed = time.process_time() - start
+    start = time.process_time()
+    framed(data, Metrics())
+    t_metrics = time.process_time() - start
+    start = time.process_time()
+    events = sum(1 for event in iter_events(data))
+    t_events = time.process_time() - start
+    if kept != expected:
+        sys.exit('framer kept different frames than the full parser')
+    if events != len(kept):
+        sys.exit('iter_events yielded a different number of events')
+    print(f'{n} frames ({len(data) / 1e6:.1f} MB), {len(kept)} relevant')
+    print(f'full parse:  {t_full:6.2f} s CPU ({n / t_full:8.0f} frames/s)')
+    print(f'framer:      {t_framed:6.2f} s CPU ({n / t_framed:8.0f} frames/s)')
+    print(f'CPU saved:   {(1 - t_framed / t_full) * 100:5.1f} %')
+    print(f'framer with metrics: {t_metrics:6.2f} s CPU ({(t_metrics / t_framed - 1) * 100:+.1f} %)')
+    print(f'iter_events:         {t_events:6.2f} s CPU ({(t_events / t_framed - 1) * 100:+.1f} %)')
@@ -0,0 +1,107 @@
+# Serial ingestion against a pty-based fake receiver.
+# Streams a synthetic capture through a pseudo terminal as fast as it will go,
+# unplugs the "receiver" halfway (the pty is closed and a new one appears under
+# the same name) and reports throughput, lost messages, ring buffer overflow,
+# reconnects and whether the raw tee matches what was read. Linux/macOS only.
+#   python benchmarks/bench_ingest.py [messages] [ring KiB]
+import io
+import os
+import pty
+import random
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyubx2 import UBXMessage, GET
+from ingest import Ingest, RawTee
+from ubxframe import UBXFramer
+
+
+def capture(n):
+    pool = []
+    for i in range(200):
+        pool.append(UBXMessage('RXM', 'RXM-RLM', GET, version=0, type=1, svId=random.randint(1, 36),
+                               beacon=random.getrandbits(60) << 4, message=1, params=random.getrandbits(16)).serialize())
+    for i in range(200):
+        dwords = {f'dwrd_{k+1:02}': random.getrandbits(32) for k in range(8)}
+        dwords['dwrd_01'] = 0x9AAC0000 | random.getrandbits(16)     # DCR, message type 43
+        pool.append(UBXMessage('RXM', 'RXM-SFRBX', GET, gnssId=5, svId=random.randint(193, 199), sigId=1, freqId=0,
+                               numWords=8, chn=1, version=2, **dwords).serialize())
+    return b''.join(random.choice(pool) for _ in range(n))
+
+class FakeReceiver:
+    # a pty whose slave side is reachable under a fixed symlink
+    def __init__(self, link):
+        self.link = link
+        self.master = None
+        self.plug()
+
+    def plug(self):
+        self.master, slave = pty.openpty()
+        tty.setraw(slave)
+        name = os.ttyname(slave)
+        os.close(slave)
+        if os.path.lexists(self.link):
+            os.unlink(self.link)
+        os.symlink(name, self.link)
+
+    def unplug(self):
+        os.close(self.master)
+
+    def send(self, data, block=4096):
+        for i in range(0, len(data), block):
+            os.write(self.master, data[i:i + block])
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ring_size = (int(sys.argv[2]) if len(sys.argv) > 2 else 1024) * 1024
+    data = capture(n)
+    half = len(data) // 2
+    with tempfile.TemporaryDirectory() as tmp:
+        link = os.path.join(tmp, 'ttyFAKE')
+        tee_path = os.path.join(tmp, 'tee.ubx')
+        receiver = FakeReceiver(link)
+        ingest = Ingest([link], ring_size=ring_size, tee=lambda source: RawTee(tee_path))
+        ingest.start()
+        reader = ingest.readers[0]
+        received = []
+        notices = []
+
+        def consume():
+            for (source, parsed_data, info) in ingest:
+                if parsed_data is None:
+                    notices.append(info)
+                else:
+                    received.append(parsed_data.identity)
+        threading.Thread(target=consume, daemon=True).start()
+
+        time.sleep(0.5)
+        start = time.perf_counter()
+        receiver.send(data[:half])
+        while reader.ring.written + reader.ring.overflow < half:
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        time.sleep(0.5)
+        receiver.unplug()       # USB hiccup
+        time.sleep(0.2)
+        receiver.plug()
+        while not reader.reconnects:
+            time.sleep(0.05)
+        time.sleep(2)           # the port is reopened after a 1 s backoff
+        receiver.send(data[half:])
+        time.sleep(1)
+        ingest.stop()
+
+        expected = sum(1 for frame in UBXFramer(io.BytesIO(data)))
+        with open(tee_path, 'rb') as f:
+            teed = f.read()
+        print(f'{n} messages, {len(data) / 1e6:.1f} MB, ring {ring_size // 1024} KiB')
+        print(f'received {len(received)} of {expected} messages, port read {half / elapsed / 1e6:.1f} MB/s')
+        print(f'ring overflow {reader.ring.overflow} bytes, reconnects {reader.reconnects}, notices {len(notices)}')
+        read = reader.ring.written + reader.ring.overflow
+        print(f'tee: {len(teed)} bytes of {read} read, {"same as" if teed == data else "differs from"} the data sent')
@@ -0,0 +1,175 @@
+# Two receivers against the live decoder.
+# gnss_addinfo_decoder.py runs on two pty-based fake receivers with --db and
+# --feed. Both first hear the same beacons and DC Report, then receiver A
+# stalls (nothing sent) and is unplugged while B keeps sending, and finally A
+# comes back. Checked from the feed, the RLM log and the store: B's messages
+# keep arriving (with their latency) while A is silent or gone, the beacons
+# and the report heard by both are one row with the counts and satellites of
+# both, A's messages arrive again after the reconnect and every row has its
+# receiver recorded. Linux/macOS only.
+#   python benchmarks/bench_multi_rx.py [messages per phase]
+import csv
+import json
+import os
+import random
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from bench_ingest import FakeReceiver
+from ubxgen import beacon_pool, dcr_frame, dcr_message, rlm_frame
+
+STALL = 3.0         # seconds A sends nothing, then as long unplugged
+TIMEOUT = 15.0
+
+
+def connect(path):
+    deadline = time.monotonic() + TIMEOUT
+    while True:
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(path)
+            return sock
+        except OSError:
+            sock.close()
+            if time.monotonic() > deadline:
+                sys.exit('the decoder did not open its feed')
+            time.sleep(0.1)
+
+class FeedClient:
+    # feed events as (arrival time, event)
+    def __init__(self, path):
+        self.events = []
+        self.sock = connect(path)
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        for line in self.sock.makefile('rb'):
+            self.events.append((time.monotonic(), json.loads(line)))
+
+    def rlm(self, hexid):
+        return [event for t, event in self.events if event['event'] == 'rlm' and event['hexid'] == hexid.upper()]
+
+    def arrival(self, hexid):
+        for t, event in self.events:
+            if event['event'] == 'rlm' and event['hexid'] == hexid.upper():
+                return t
+
+    def wait(self, hexids):
+        deadline = time.monotonic() + TIMEOUT
+        while any(self.arrival(hexid) is None for hexid in hexids) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+def send_spread(receiver, frames, seconds):
+    # -> send time per frame, the frames spread evenly over seconds
+    sent = []
+    for frame in frames:
+        sent.append(time.monotonic())
+        receiver.send(frame)
+        time.sleep(seconds / len(frames))
+    return sent
+
+def latencies(feed, hexids, sent):
+    found = [feed.arrival(hexid) for hexid in hexids]
+    if None in found:
+        return None
+    return sorted(t - s for t, s in zip(found, sent))
+
+def check(ok, text):
+    print(f'{"ok  " if ok else "FAIL"} {text}')
+    return ok
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = random.Random(0)
+    shared, during_stall, during_unplug, after = (beacon_pool(rng, n) for _ in range(4))
+    report = dcr_message(rng, 5)
+    with tempfile.TemporaryDirectory() as tmp:
+        a = FakeReceiver(os.path.join(tmp, 'ttyA'))
+        b = FakeReceiver(os.path.join(tmp, 'ttyB'))
+        feed_path = os.path.join(tmp, 'feed.sock')
+        rlm_path = os.path.join(tmp, 'RLM_log.csv')
+        db_path = os.path.join(tmp, 'events.db')
+        decoder = subprocess.Popen([sys.executable, os.path.join(ROOT, 'gnss_addinfo_decoder.py'), a.link, b.link,
+                                    '--db', db_path, '--feed', feed_path, '--out_rlm_file', rlm_path,
+                                    '--out_dcr_file', os.path.join(tmp, 'DCR_log.csv'), '--log_flush_sec', '0.2'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, cwd=tmp)
+        feed = FeedClient(feed_path)
+        time.sleep(1)
+
+        # both receivers hear the same beacons and report
+        for hexid in shared:
+            a.send(rlm_frame(hexid, 1))
+            b.send(rlm_frame(hexid, 2))
+        a.send(dcr_frame(report, 193))
+        b.send(dcr_frame(report, 194))
+        feed.wait(shared)
+
+        # A stalls, then is unplugged; B goes on
+        sent = send_spread(b, [rlm_frame(hexid, 3) for hexid in during_stall], STALL)
+        feed.wait(during_stall)
+        stall = latencies(feed, during_stall, sent)
+        a.unplug()
+        sent = send_spread(b, [rlm_frame(hexid, 3) for hexid in during_unplug], STALL)
+        feed.wait(during_unplug)
+        unplugged = latencies(feed, during_unplug, sent)
+
+        # A is back; it is reopened after the reconnect backoff
+        a.plug()
+        start = time.monotonic()
+        pending = list(after)
+        while pending and time.monotonic() - start < TIMEOUT:
+            for hexid in pending:
+                a.send(rlm_frame(hexid, 4))
+            time.sleep(0.5)
+            pending = [hexid for hexid in pending if feed.arrival(hexid) is None]
+        reconnect = time.monotonic() - start
+
+        time.sleep(0.5)
+        decoder.send_signal(signal.SIGINT)
+        errors = decoder.communicate(timeout=TIMEOUT)[1].decode()
+
+        with open(rlm_path, newline='') as f:
+            log = list(csv.reader(f, delimiter=';'))
+        db = sqlite3.connect(db_path)
+        stored = db.execute('SELECT source, COUNT(*) FROM rlm GROUP BY source').fetchall()
+        dcr_sources = db.execute('SELECT source FROM dcr').fetchall()
+        reports = [event for t, event in feed.events if event['event'] == 'dcr']
+
+        print(f'{n} beacons per phase, A silent for {STALL:.0f} s, then unplugged for {STALL:.0f} s')
+        passed = all([
+            check(stall is not None, f'B while A stalls: {len(during_stall)} beacons arrived'
+                  + (f', latency median {stall[len(stall) // 2] * 1e3:.1f} ms, max {stall[-1] * 1e3:.1f} ms' if stall else '')),
+            check(unplugged is not None, f'B while A is unplugged: {len(during_unplug)} beacons arrived'
+                  + (f', latency median {unplugged[len(unplugged) // 2] * 1e3:.1f} ms, max {unplugged[-1] * 1e3:.1f} ms'
+                     if unplugged else '')),
+            check(all(event['source'] == b.link for hexid in during_stall + during_unplug for event in feed.rlm(hexid)),
+                  "B's beacons carry B as source"),
+            check(not pending, f'A after the reconnect: {len(after) - len(pending)} of {len(after)} beacons arrived '
+                  f'within {reconnect:.1f} s'),
+            check(all(len(feed.rlm(hexid)) == 2 and [event['new'] for event in feed.rlm(hexid)] == [True, False]
+                      and feed.rlm(hexid)[-1]['count'] == 2
+                      and {event['source'] for event in feed.rlm(hexid)} == {a.link, b.link} for hexid in shared),
+                  f'{len(shared)} beacons heard by both: one row each, count 2, sources A and B'),
+            check(len(reports) == 2 and reports[0]['new'] and reports[-1]['sats'] == {'193': 1, '194': 1},
+                  'report heard by both: one row, satellites 193 and 194'),
+            check(log[0][-1] == 'RECEIVER' and len(log) - 1 == 4 * n
+                  and all(row[-1] in (a.link, b.link) for row in log[1:]),
+                  f'RLM log: {len(log) - 1} rows, RECEIVER column filled'),
+            check(sum(count for source, count in stored) == sum(event['event'] == 'rlm' for t, event in feed.events)
+                  and all(source in (a.link, b.link) for source, count in stored)
+                  and dcr_sources and all(source in (a.link, b.link) for source, in dcr_sources),
+                  f'store: {", ".join(f"{os.path.basename(source)} {count}" for source, count in stored)} RLM rows, '
+                  f'source of every row recorded'),
+        ])
+        if not passed:
+            print(errors)
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,70 @@
+# NAV-SAT handling: rebuilding both header lines every epoch against the
+# Sky state map that only redraws when a Galileo or QZSS quality changed.
+# Epochs come from ubxgen's drifting sky, decoded once up front.
+#   python benchmarks/bench_navsat.py [epochs]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyubx2 import UBXReader
+from decoder import decode_navsat
+from sky import Sky
+from ubxgen import Traffic, navsat_frame
+
+REPEAT = 5
+
+
+def sat_str(svid, quality):
+    if quality in (5, 6, 7):
+        return f'[bold green3]{svid}[/bold green3] '
+    if quality == 4:
+        return f'[bold yellow3]{svid}[/bold yellow3] '
+    return f'[bold grey46]{svid}[/bold grey46] '
+
+def rebuild(events):
+    # the previous navsat_update: both strings built and both tables redrawn every epoch
+    redraws = 0
+    for event in events:
+        gal = qzss = ''
+        for gnss, svid, quality, cno, elev in event.svs:
+            if gnss == 2:
+                gal += sat_str(svid, quality)
+            elif gnss == 5:
+                qzss += sat_str(svid, quality)
+        redraws += 2
+    return redraws
+
+def changes_only(events):
+    sky = Sky()
+    lines = {2: '', 5: ''}
+    redraws = 0
+    for event in events:
+        changes = sky.update(event.svs, 0)
+        for gnss in {gnss for gnss, svid, quality in changes} & lines.keys():
+            line = ''.join(sat_str(sat.svid, sat.quality) for sat in sky.system(gnss))
+            if line != lines[gnss]:
+                lines[gnss] = line
+                redraws += 1
+    return redraws
+
+def best(fn, events):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        redraws = fn(events)
+        times.append(time.perf_counter() - start)
+    return min(times), redraws
+
+
+if __name__ == '__main__':
+    epochs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    traffic = Traffic(0)
+    events = []
+    for i in range(epochs):
+        traffic.drift()
+        events.append(decode_navsat(UBXReader.parse(navsat_frame(traffic.sky, i * 1000))))
+    print(f'{epochs} NAV-SAT epochs, {len(traffic.sky)} satellites each')
+    for name, fn in (('rebuild every epoch', rebuild), ('Sky, changes only', changes_only)):
+        t, redraws = best(fn, events)
+        print(f'{name:<20} {t / epochs * 1e6:7.1f} us/epoch {redraws:>6} redraws')
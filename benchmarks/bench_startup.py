@@ -0,0 +1,80 @@
+# Cold start of the decoder per mode, measured with python -X importtime in a
+# fresh interpreter: wall time, total import time, the most expensive top-level
+# imports and which of the heavy dependencies each mode pulled in. Runs from an
+# empty directory, so it also checks that the country table is found without a
+# country.csv in the cwd. Also compares parsing country.csv to loading the cache.
+#   python benchmarks/bench_startup.py [runs]
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import beacon_decode
+
+SCRIPT = os.path.join(ROOT, 'gnss_addinfo_decoder.py')
+HEAVY = ('rich', 'pyubx2', 'serial', 'sqlite3', 'http.server', 'concurrent.futures')
+
+
+def capture(path):
+    # a few RLMs are enough, this is about startup, not decoding
+    from ubxgen import beacon_pool, rlm_frame
+    rng = random.Random(0)
+    with open(path, 'wb') as f:
+        for hexid in beacon_pool(rng, 10):
+            f.write(rlm_frame(hexid, rng.randint(1, 36)))
+
+def importtime(stderr):
+    # -> total import time (s), [(cumulative s, top-level module)], imported module names
+    total, top, names = 0, [], set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        names.add(name.strip())
+        if not name.startswith('  ', 1):
+            top.append((int(cumulative) / 1e6, name.strip()))
+    return total / 1e6, sorted(top, reverse=True), names
+
+def run(args, cwd, runs):
+    walls, totals = [], []
+    for i in range(runs):
+        start = time.perf_counter()
+        done = subprocess.run([sys.executable, '-X', 'importtime', SCRIPT] + args, cwd=cwd,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        walls.append(time.perf_counter() - start)
+        total, top, names = importtime(done.stderr)
+        totals.append(total)
+    return sorted(walls)[runs // 2], sorted(totals)[runs // 2], top, names
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        capture(os.path.join(tmp, 'tiny.ubx'))
+        modes = {'-h': ['-h'],
+                 '--replay': ['--replay', 'tiny.ubx'],
+                 '--replay --jobs 2': ['--replay', 'tiny.ubx', '--jobs', '2'],
+                 '--replay --db': ['--replay', 'tiny.ubx', '--db', 'events.db']}
+        print(f'median of {runs} runs')
+        for mode, args in modes.items():
+            wall, total, top, names = run(args, tmp, runs)
+            heavy = [m for m in HEAVY if m in names]
+            print(f'{mode:20} wall {wall * 1e3:6.1f} ms, imports {total * 1e3:6.1f} ms, heavy: {", ".join(heavy) or "none"}')
+            print('    ' + ', '.join(f'{name} {t * 1e3:.1f}' for t, name in top[:5]))
+
+    n = 200
+    start = time.perf_counter()
+    for i in range(n):
+        beacon_decode.read_countries(beacon_decode.COUNTRY_CSV)
+    parse = (time.perf_counter() - start) / n
+    beacon_decode.load_countries()
+    start = time.perf_counter()
+    for i in range(n):
+        beacon_decode.load_countries()
+    cached = (time.perf_counter() - start) / n
+    print(f'country table: csv {parse * 1e3:.2f} ms, cached {cached * 1e3:.2f} ms ({len(beacon_decode.countries)} countries)')
@@ -0,0 +1,129 @@
+# SQLite event store: insert throughput while replaying a synthetic capture,
+# and query latency on a database with millions of RLM rows.
+#   python benchmarks/bench_store.py [rlm rows]
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyubx2 import UBXMessage, GET
+from beacon_decode import beacon_hexid, beacon_info, beacon_key
+from dcr_decode import dcr_bits
+from store import EventStore, payload_blob, query_dcr, query_rlm, to_blob
+from ubxframe import UBXFramer
+
+REPLAY_MESSAGES = 50000
+QUERY_REPEAT = 20
+BEACONS = 20000
+T0 = 1700000000
+
+
+def capture(n):
+    pool = []
+    for i in range(500):
+        pool.append(UBXMessage('RXM', 'RXM-RLM', GET, version=0, type=1, svId=random.randint(1, 36),
+                               beacon=random.getrandbits(60) << 4, message=1, params=random.getrandbits(16)).serialize())
+    for i in range(500):
+        dwords = {f'dwrd_{k+1:02}': random.getrandbits(32) for k in range(8)}
+        dwords['dwrd_01'] = 0x9AAC0000 | random.getrandbits(16)     # DCR, message type 43
+        pool.append(UBXMessage('RXM', 'RXM-SFRBX', GET, gnssId=5, svId=random.randint(193, 199), sigId=1, freqId=0,
+                               numWords=8, chn=1, version=2, **dwords).serialize())
+    return b''.join(random.choice(pool) for _ in range(n))
+
+def decode(data):
+    # -> [(RLM?, add_rlm/add_dcr arguments)], decoded before the store is timed
+    events = []
+    for (raw_data, parsed_data) in UBXFramer(io.BytesIO(data)):
+        ts = int(time.time())
+        if parsed_data.identity == 'RXM-RLM':
+            key = beacon_key(parsed_data.beacon)
+            events.append((True, (ts, parsed_data.svId, key, *beacon_info(beacon_hexid(key)), parsed_data.message,
+                                  bin(parsed_data.params)[2:].zfill(16))))
+        else:
+            events.append((False, (ts, parsed_data.svId, dcr_bits(getattr(parsed_data, f'dwrd_{i+1:02}') for i in range(8)))))
+    return events
+
+def replay_inserts(path, events):
+    # -> seconds spent in the EventStore add_*() calls and close()
+    store = EventStore(path)
+    start = time.perf_counter()
+    for rlm, args in events:
+        if rlm:
+            store.add_rlm(*args)
+        else:
+            store.add_dcr(*args)
+    store.close()
+    return time.perf_counter() - start
+
+def fill(path, rows):
+    # bulk rows straight through SQL, spread over a year
+    store = EventStore(path)
+    store.close()
+    db = sqlite3.connect(path)
+    hexids = [beacon_hexid(beacon_key(random.getrandbits(64))).upper() for _ in range(BEACONS)]
+    step = 365 * 86400 // rows
+    with db:
+        db.executemany('INSERT INTO rlm (ts, svid, hexid, type, country, message, params) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       ((T0 + i * step, random.randint(1, 36), random.choice(hexids), 'EPIRB', 'France', 1, '0' * 16)
+                        for i in range(rows)))
+        for i in range(rows // 10):
+            bits = random.getrandbits(256)
+            row_id = db.execute('INSERT INTO dcr (payload, bits, report, msg_type, priority, category, info_type, svid, '
+                                'first_seen, last_seen, count) VALUES (?, ?, ?, 43, 3, ?, 0, ?, ?, ?, 1)',
+                                (payload_blob(bits), to_blob(bits), i, random.randint(1, 14), random.randint(193, 199),
+                                 T0 + i * step * 10, T0 + i * step * 10)).lastrowid
+            db.executemany('INSERT OR IGNORE INTO dcr_region (code, dcr) VALUES (?, ?)',
+                           ((random.randint(1, 1000), row_id) for _ in range(3)))
+    db.close()
+    return hexids
+
+def latency(fn):
+    times = []
+    for _ in range(QUERY_REPEAT):
+        start = time.perf_counter()
+        rows = fn().fetchall()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2], len(rows)
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    with tempfile.TemporaryDirectory() as tmp:
+        data = capture(REPLAY_MESSAGES)
+        start = time.perf_counter()
+        events = decode(data)
+        t_decode = time.perf_counter() - start
+        path = os.path.join(tmp, 'replay.db')
+        elapsed = replay_inserts(path, events)
+        db = sqlite3.connect(path)
+        rlm_rows, = db.execute('SELECT COUNT(*) FROM rlm').fetchone()
+        dcr_rows, = db.execute('SELECT COUNT(*) FROM dcr').fetchone()
+        db.close()
+        print(f'replay, decode only: {len(events) / t_decode:8.0f} msg/s')
+        print(f'store add + flush:   {len(events) / elapsed:8.0f} msg/s, {(rlm_rows + dcr_rows) / elapsed:.0f} rows inserted/s '
+              f'({rlm_rows} RLM, {dcr_rows} distinct DCR rows)')
+
+        path = os.path.join(tmp, 'big.db')
+        start = time.perf_counter()
+        hexids = fill(path, rows)
+        print(f'filled {rows} RLM and {rows // 10} DCR rows in {time.perf_counter() - start:.1f} s, '
+              f'{os.path.getsize(path) / 1e6:.0f} MB')
+        db = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        month = (T0 + 180 * 86400, T0 + 210 * 86400)
+        queries = (
+            ('RLM by HEXID', lambda: query_rlm(db, hexid=hexids[0])),
+            ('RLM by HEXID, one month', lambda: query_rlm(db, hexid=hexids[0], since=month[0], until=month[1])),
+            ('RLM by svId, one day', lambda: query_rlm(db, svid=7, since=month[0], until=month[0] + 86400)),
+            ('DCR by category, one month', lambda: query_dcr(db, category=5, since=month[0], until=month[1])),
+            ('DCR by category and region', lambda: query_dcr(db, category=5, region=101)),
+        )
+        print(f'{"query":<28} {"median ms":>10} {"rows":>7}')
+        for name, fn in queries:
+            t, found = latency(fn)
+            print(f'{name:<28} {t * 1e3:>10.2f} {found:>7}')
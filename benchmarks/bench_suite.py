@@ -0,0 +1,119 @@
+# End-to-end decoder benchmarks on generated traffic (see ubxgen.py).
+# Replays the captures through gnss_addinfo_decoder.py in fresh processes and
+# reports messages/s, the per-stage latency from --metrics_file histograms and
+# peak memory as the tables grow. --json saves the numbers, --compare prints
+# the change against a saved run, so a slower decode loop shows up as a diff.
+# A standalone script like the other benchmarks rather than a pytest-benchmark
+# or asv suite: neither is installed with the decoder, and both time functions
+# in-process while these numbers come from whole --replay runs in fresh
+# processes (throughput, --metrics_file stage histograms, peak RSS).
+# Linux/macOS (peak RSS from wait4).
+#   python benchmarks/bench_suite.py [--seconds N] [--json FILE] [--compare FILE]
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+from ubxgen import Traffic, beacon_pool, dcr_frame, report_pool, rlm_frame
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gnss_addinfo_decoder.py')
+TABLE_SIZES = (1000, 5000, 20000)
+RUNS = 3
+
+
+def replay(path, cwd, extra=()):
+    # -> (messages/s, peak RSS in bytes) of one --replay run
+    proc = subprocess.Popen([sys.executable, SCRIPT, '--replay', path, *extra], cwd=cwd,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    out = proc.stdout.read()
+    pid, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode:
+        sys.exit(out)
+    rate = float(re.search(r'\((\d+) msg/s\)', out).group(1))
+    return rate, usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+def stage_latency(text):
+    # gnss_stage_seconds histograms -> {stage: {count, mean_us, p50_us, p99_us}};
+    # percentiles are bucket upper bounds
+    buckets = {}
+    sums = {}
+    for line in text.splitlines():
+        m = re.match(r'gnss_stage_seconds_bucket\{stage="(\w+)",le="([^"]+)"\} (\d+)', line)
+        if m:
+            buckets.setdefault(m[1], []).append((float(m[2]), int(m[3])))
+        m = re.match(r'gnss_stage_seconds_sum\{stage="(\w+)"\} (\S+)', line)
+        if m:
+            sums[m[1]] = float(m[2])
+    stages = {}
+    for stage, counts in buckets.items():
+        total = counts[-1][1]
+        if not total:
+            continue
+        pct = lambda q: next(bound for bound, n in counts if n >= q * total) * 1e6
+        stages[stage] = {'count': total, 'mean_us': sums[stage] / total * 1e6,
+                         'p50_us': pct(0.5), 'p99_us': pct(0.99)}
+    return stages
+
+def table_capture(path, n):
+    # n distinct beacons and n distinct reports, each heard once
+    rng = random.Random(n)
+    with open(path, 'wb') as f:
+        for hexid in beacon_pool(rng, n):
+            f.write(rlm_frame(hexid, rng.randint(1, 36)))
+        for bits in report_pool(rng, n):
+            f.write(dcr_frame(bits, rng.randint(193, 199)))
+
+def change(new, old):
+    return f'{(new / old - 1) * 100:+.1f} %' if old else ''
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='decoder benchmark suite')
+    parser.add_argument('--seconds', type=int, default=3600, help='receiver time to generate for the throughput runs')
+    parser.add_argument('--json', type=str, help='save the results to this file')
+    parser.add_argument('--compare', type=str, help='show the change against results saved with --json')
+    args = parser.parse_args()
+    old = {}
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = os.path.join(tmp, 'traffic.ubx')
+        with open(capture, 'wb') as f:
+            for frame in Traffic(0, rlm_per_min=30, dcr_share=0.3).frames(args.seconds):
+                f.write(frame)
+        print(f'{args.seconds} s of traffic, {os.path.getsize(capture) / 1e6:.1f} MB')
+
+        rate = sorted(replay(capture, tmp)[0] for i in range(RUNS))[RUNS // 2]
+        results['messages_per_s'] = rate
+        print(f'end to end: {rate:.0f} msg/s {change(rate, old.get("messages_per_s"))}')
+
+        replay(capture, tmp, ('--metrics_file', 'metrics.prom', '--metrics_sec', '3600'))
+        with open(os.path.join(tmp, 'metrics.prom')) as f:
+            results['stages'] = stage_latency(f.read())
+        print(f'{"stage":>10} {"count":>8} {"mean us":>9} {"p50 us":>8} {"p99 us":>8}')
+        for stage, s in sorted(results['stages'].items()):
+            was = old.get('stages', {}).get(stage, {}).get('mean_us')
+            print(f'{stage:>10} {s["count"]:>8} {s["mean_us"]:>9.1f} {s["p50_us"]:>8.0f} {s["p99_us"]:>8.0f} {change(s["mean_us"], was)}')
+
+        results['memory'] = {}
+        print(f'{"rows":>10} {"peak MB":>8}')
+        for n in TABLE_SIZES:
+            path = os.path.join(tmp, f'tables{n}.ubx')
+            table_capture(path, n)
+            rss = replay(path, tmp)[1]
+            results['memory'][str(n)] = rss
+            print(f'{2 * n:>10} {rss / 1e6:>8.1f} {change(rss, old.get("memory", {}).get(str(n)))}')
+        small, large = TABLE_SIZES[0], TABLE_SIZES[-1]
+        per_row = (results['memory'][str(large)] - results['memory'][str(small)]) / (2 * (large - small))
+        results['bytes_per_row'] = per_row
+        print(f'growth: {per_row:.0f} bytes per table row {change(per_row, old.get("bytes_per_row"))}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
@@ -0,0 +1,87 @@
+# Per-message cost of a beacon lookup/update against table size, compared with
+# the old linear scan over a list of rows, and memory per 100k beacons of the
+# old list rows vs. the slotted records, without and with eviction limits.
+#   python benchmarks/bench_tables.py
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tables import Beacon, RecordTable
+
+SIZES = (10, 100, 1000, 10000, 100000)
+LOOKUPS = 20000
+MEMORY_ROWS = 100000
+TYPES = ('EPIRB', 'PLB', 'ELT', 'SSAS')
+COUNTRIES = ('France', 'Germany', 'Italy', 'Norway')
+
+
+def make_rows(n):
+    rows = []
+    for i in range(n):
+        hexid = f'{random.getrandbits(60):015X}'
+        rows.append([random.randint(1, 36), hexid, 'EPIRB', 'France', '12:00 01-01', 1])
+    return rows
+
+def indexed(rows, keys):
+    table = RecordTable()
+    for row in rows:
+        table.add(Beacon(int(row[1], 16), row[0], 0))
+    start = time.perf_counter()
+    for key in keys:
+        row = table.get(int(key, 16))
+        row.svid = 7
+        row.last_seen = 1
+        row.count += 1
+        table.touch(row)
+    return (time.perf_counter() - start) / len(keys)
+
+def linear(rows, keys):
+    start = time.perf_counter()
+    for key in keys:
+        for row in rows:
+            if row.count(key) > 0:
+                row[0] = 7
+                row[5] += 1
+                break
+    return (time.perf_counter() - start) / len(keys)
+
+def allocated(build):
+    tracemalloc.start()
+    table = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+def list_rows():
+    # the old table: list rows with formatted HEXID and time strings, indexed by HEXID
+    rows = {}
+    for i in range(MEMORY_ROWS):
+        row = [random.randint(1, 36), f'{random.getrandbits(60):015X}', random.choice(TYPES),
+               random.choice(COUNTRIES), f'12:{i % 60:02} 01-01', 1]
+        rows[row[1]] = row
+    return rows
+
+def records(table=None):
+    table = RecordTable() if table is None else table
+    for i in range(MEMORY_ROWS):
+        table.add(Beacon(random.getrandbits(60) << 4, random.randint(1, 36), 1700000000 + i))
+    return table
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    print(f'{"entries":>8} {"indexed ns/msg":>15} {"linear ns/msg":>15}')
+    for n in SIZES:
+        rows = make_rows(n)
+        keys = [random.choice(rows)[1] for _ in range(LOOKUPS)]
+        t_idx = indexed(rows, keys)
+        # the linear scan gets slow quickly, keep its sample small
+        t_lin = linear(rows, keys[:max(20, LOOKUPS * 10 // n)])
+        print(f'{n:>8} {t_idx * 1e9:>15.0f} {t_lin * 1e9:>15.0f}')
+    print(f'memory per {MEMORY_ROWS} beacons:')
+    print(f'  list rows           {allocated(list_rows) / 1e6:5.1f} MB')
+    print(f'  records             {allocated(records) / 1e6:5.1f} MB')
+    print(f'  records, evicting   {allocated(lambda: records(RecordTable(max_rows=MEMORY_ROWS))) / 1e6:5.1f} MB')
@@ -0,0 +1,85 @@
+# .ubxz archive: size against the raw .ubx capture and seek-plus-decode latency
+# of a one-hour window in a month-long archive. One hour of generated traffic
+# (ubxgen.Traffic) is written 30 * 24 times with increasing timestamps; the
+# raw month is not written, its size and the cost of reading it up to the
+# window are extrapolated from the hour.
+#   python benchmarks/bench_ubxz.py [days]
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from decoder import decode_message
+from ubxframe import UBXFramer, relevant_frame
+from ubxgen import Traffic
+from ubxz import UBXZReader, UBXZWriter
+
+T0 = 1788220800         # 2026-09-01 00:00 UTC
+WINDOWS = 5
+
+
+def decode(stream):
+    n = 0
+    for (raw_data, parsed_data) in UBXFramer(stream):
+        if decode_message(parsed_data) is not None:
+            n += 1
+    return n
+
+def hour():
+    # -> (raw capture of one hour, [(second, frame)] of the frames an archive keeps)
+    traffic = Traffic(0, rlm_per_min=2, dcr_share=0.3)
+    raw = bytearray()
+    kept = []
+    for t in range(3600):
+        for frame in traffic.epoch(t):
+            raw += frame
+            if relevant_frame(frame):
+                kept.append((t, frame))
+    return bytes(raw), kept
+
+
+if __name__ == '__main__':
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    hours = days * 24
+    raw, kept = hour()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'month.ubxz')
+        start = time.perf_counter()
+        writer = UBXZWriter(path)
+        for h in range(hours):
+            base = T0 + h * 3600
+            for t, frame in kept:
+                writer.write(frame, base + t)
+        writer.close()
+        t_write = time.perf_counter() - start
+        size = os.path.getsize(path)
+        raw_size = len(raw) * hours
+        print(f'{days} days: raw .ubx {raw_size / 1e6:.0f} MB (estimated), .ubxz {size / 1e6:.1f} MB, '
+              f'{raw_size / size:.0f}x smaller; written in {t_write:.1f} s')
+
+        start = time.perf_counter()
+        n_raw = decode(io.BytesIO(raw))
+        t_hour = time.perf_counter() - start
+        middle = hours // 2
+        print(f'raw .ubx:  one hour decoded in {t_hour * 1e3:.0f} ms ({n_raw} messages), reaching hour {middle} '
+              f'means reading {middle} hours first: ~{t_hour * (middle + 1):.0f} s')
+
+        times = []
+        for i in range(WINDOWS):
+            since = T0 + (middle + i * 7) % hours * 3600
+            start = time.perf_counter()
+            with UBXZReader(path) as reader:
+                n = decode(reader.stream(since, since + 3600))
+            times.append(time.perf_counter() - start)
+        times.sort()
+        start = time.perf_counter()
+        with UBXZReader(path) as reader:
+            frames = sum(1 for frame in reader.frames(since, since + 3600))
+            t_seek = time.perf_counter() - start
+            chunks = len(list(reader.select(since, since + 3600)))
+            total = len(reader.chunks)
+        print(f'.ubxz:     open + seek + decompress of a one-hour window: {t_seek * 1e3:.1f} ms ({frames} frames)')
+        print(f'.ubxz:     open + seek + decode of a one-hour window: median {times[WINDOWS // 2] * 1e3:.0f} ms, '
+              f'{n} messages from {chunks} of {total} chunks')
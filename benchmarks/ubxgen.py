@@ -0,0 +1,179 @@
+# Synthetic receiver traffic for the benchmarks.
+# Frames are built with pyubx2's UBXMessage serialization: short and long
+# RXM-RLM for beacons of every protocol type and many countries, QZSS L1S
+# subframes carrying DC Reports of every dcr_msg_types category (and other L1S
+# messages), GPS and Galileo navigation subframes the decoder has to skip, and
+# NAV-SAT epochs over a slowly changing sky. Traffic(seed) always produces the
+# same bytes for the same seed.
+#   python benchmarks/ubxgen.py out.ubx [seconds] [seed]
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyubx2 import UBXMessage, GET
+from beacon_decode import TYPE_TABLE, countries, hexid_beacon, load_countries
+from dcr_decode import DCR_BITS, DCR_LAYOUTS, DCR_REPORT, dcr_msg_types
+
+GPS, GALILEO, QZSS = 0, 2, 5
+PREAMBLES = (0x53, 0x9A, 0xC6)      # L1S preambles, rotating every second
+DCR, DCX = 43, 44
+L1S_OTHER = (47, 48, 49, 50, 51, 52, 53, 63)   # SBAS-style L1S messages, not reports
+
+
+def rlm_frame(hexid, svid, long=False, message=0, params=0, spare=0):
+    # spare: bits 4-7 of the beacon field, which are not part of the HEXID
+    return UBXMessage('RXM', 'RXM-RLM', GET, version=0, type=2 if long else 1, svId=svid,
+                      beacon=hexid_beacon(hexid) | spare << 4, message=message, params=params).serialize()
+
+def subframe(gnss, svid, dwords):
+    words = {f'dwrd_{i+1:02}': dword for i, dword in enumerate(dwords)}
+    return UBXMessage('RXM', 'RXM-SFRBX', GET, gnssId=gnss, svId=svid, sigId=1 if gnss == QZSS else 0, freqId=0,
+                      numWords=len(dwords), chn=1, version=2, **words).serialize()
+
+def dcr_frame(bits, svid):
+    return subframe(QZSS, svid, [(bits >> (32 * (7 - i))) & 0xFFFFFFFF for i in range(8)])
+
+def navsat_frame(svs, itow=0):
+    # svs: [gnssId, svId, cno, elev, azim, qualityInd]
+    fields = {}
+    for i, (gnss, svid, cno, elev, azim, quality) in enumerate(svs, 1):
+        fields.update({f'gnssId_{i:02}': gnss, f'svId_{i:02}': svid, f'cno_{i:02}': cno,
+                       f'elev_{i:02}': elev, f'azim_{i:02}': azim, f'qualityInd_{i:02}': quality})
+    return UBXMessage('NAV', 'NAV-SAT', GET, iTOW=itow, version=1, numSvs=len(svs), **fields).serialize()
+
+
+def make_hexid(flag, country, protocol, serial):
+    # protocol flag, 10 bit country code, the 10 protocol bits beacon_decode
+    # classifies and 39 more bits
+    return format(flag << 59 | country << 49 | protocol << 39 | serial, '015x')
+
+def beacon_pool(rng, n):
+    # n HEXIDs; the first ones cover every beacon type, countries are drawn
+    # from country.csv with an occasional unassigned code
+    if not countries:
+        load_countries()
+    codes = sorted(countries)
+    by_type = {}
+    for key, name in enumerate(TYPE_TABLE):
+        by_type.setdefault(name, []).append(key)
+    types = sorted(by_type)
+    pool = []
+    for i in range(n):
+        key = rng.choice(by_type[types[i % len(types)]])
+        country = rng.choice(codes) if rng.random() < 0.95 else rng.randrange(1024)
+        pool.append(make_hexid(key >> 10, country, key & 0x3FF, rng.getrandbits(39)))
+    return pool
+
+
+def put(v, start, end, value):
+    # value into bits start..end (from the MSB of the 256-bit message)
+    return v | (value & ((1 << (end - start)) - 1)) << (DCR_BITS - end)
+
+def dcr_message(rng, category, priority=3, info_type=0, msg_type=DCR, preamble=0x9A):
+    # 256 message bits of a report with random but plausible fields and
+    # 1..max entries in the repeating group
+    v = put(put(put(0, 0, 8, preamble), 8, 14, msg_type), 14, 17, priority)
+    header = {'category': category, 'month': rng.randint(1, 12), 'day': rng.randint(1, 28),
+              'hour': rng.randrange(24), 'minute': rng.randrange(60), 'info_type': info_type}
+    if msg_type == DCX:
+        return put(v, 17, 23, rng.randrange(1, 64)) | rng.getrandbits(200) << 30
+    for name, start, end in DCR_REPORT:
+        v = put(v, start, end, header[name])
+    fields, group = DCR_LAYOUTS.get(category, ((), None))
+    for name, start, end in fields:
+        v = put(v, start, end, rng.getrandbits(end - start))
+    if group is not None:
+        first, size, count, entry_fields = group
+        for i in range(rng.randint(1, count)):
+            entry = 0
+            for name, start, end in entry_fields:
+                entry |= rng.getrandbits(end - start) << (size - end)
+            v = put(v, first + i * size, first + (i + 1) * size, entry or 1)
+    return v
+
+def report_pool(rng, n):
+    # n distinct reports going through every category, a few from other organizations (DCX)
+    pool = []
+    categories = sorted(dcr_msg_types)
+    for i in range(n):
+        if i % 20 == 19:
+            pool.append(dcr_message(rng, 0, msg_type=DCX))
+        else:
+            pool.append(dcr_message(rng, categories[i % len(categories)], priority=rng.choice((1, 2, 3, 3, 3, 7)),
+                                    info_type=rng.choice((0, 0, 0, 1, 2))))
+    return pool
+
+
+class Traffic:
+    # a receiver's output second by second: a Galileo I/NAV page every 2 s and
+    # a GPS subframe every 6 s per satellite, one L1S message per QZSS satellite
+    # and second, NAV-SAT every navsat_sec seconds and RLMs relayed by Galileo
+    def __init__(self, seed=0, beacons=200, reports=100, rlm_per_min=1.0, long_share=0.2,
+                 dcr_share=0.1, navsat_sec=20, galileo=10, gps=10, qzss=4):
+        self.rng = random.Random(seed)
+        self.beacons = beacon_pool(self.rng, beacons)
+        self.reports = report_pool(self.rng, reports)
+        self.rlm_rate = rlm_per_min / 60
+        self.long_share = long_share
+        self.dcr_share = dcr_share
+        self.navsat_sec = navsat_sec
+        self.gal = self.sats(GALILEO, range(1, 37), galileo)
+        self.gps = self.sats(GPS, range(1, 33), gps)
+        self.qzs = self.sats(QZSS, range(193, 200), qzss)
+        self.sky = self.gal + self.gps + self.qzs
+
+    def sats(self, gnss, svids, n):
+        rng = self.rng
+        return [[gnss, svid, rng.randint(25, 48), rng.randint(5, 85), rng.randrange(360), rng.choice((4, 5, 6, 7))]
+                for svid in rng.sample(svids, n)]
+
+    def drift(self):
+        # signal levels wander, satellites occasionally lose or regain lock
+        rng = self.rng
+        for sat in self.sky:
+            sat[2] = min(50, max(0, sat[2] + rng.choice((-1, 0, 0, 1))))
+            if rng.random() < 0.02:
+                sat[5] = rng.choice((1, 4, 5, 6, 7))
+
+    def epoch(self, t):
+        rng = self.rng
+        out = []
+        for i, (gnss, svid, *state) in enumerate(self.gal):
+            if (t + i) % 2 == 0:
+                out.append(subframe(GALILEO, svid, [rng.getrandbits(32) for k in range(8)]))
+            if rng.random() < self.rlm_rate / len(self.gal):
+                long = rng.random() < self.long_share
+                out.append(rlm_frame(rng.choice(self.beacons), svid, long, rng.getrandbits(4),
+                                     rng.getrandbits(96 if long else 16), rng.getrandbits(4)))
+        for i, (gnss, svid, *state) in enumerate(self.gps):
+            if (t + i) % 6 == 0:
+                out.append(subframe(GPS, svid, [rng.getrandbits(32) for k in range(10)]))
+        preamble = PREAMBLES[t % 3]
+        for gnss, svid, *state in self.qzs:
+            if rng.random() < self.dcr_share:
+                bits = rng.choice(self.reports)
+                out.append(dcr_frame(bits & ~(0xFF << 248) | preamble << 248, svid))
+            else:
+                out.append(subframe(QZSS, svid, [preamble << 24 | rng.choice(L1S_OTHER) << 18 | rng.getrandbits(18)]
+                                    + [rng.getrandbits(32) for k in range(7)]))
+        if t % self.navsat_sec == 0:
+            self.drift()
+            out.append(navsat_frame(self.sky, t * 1000))
+        return out
+
+    def frames(self, seconds):
+        for t in range(seconds):
+            yield from self.epoch(t)
+
+    def capture(self, seconds):
+        return b''.join(self.frames(seconds))
+
+
+if __name__ == '__main__':
+    path = sys.argv[1]
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 3600
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    with open(path, 'wb') as f:
+        for frame in Traffic(seed).frames(seconds):
+            f.write(frame)
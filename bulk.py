@@ -0,0 +1,129 @@
+# Columnar bulk decoding of archived captures, for analytics over millions of
+# messages. Needs numpy (pip install numpy), which nothing else here imports.
+# Frames are found and checked as by ubxframe.UBXFramer, but instead of being
+# parsed by pyubx2 one by one the RXM-RLM and DC Report payloads are copied
+# into NumPy arrays (HEXIDs as uint64, the DCR dwords as uint32) and every
+# field is taken with vectorized shifts and masks. The result is structured
+# arrays, one row per message:
+#
+#   from bulk import load
+#   rlm, dcr, fields = load(['capture.ubx'])
+#   rlm[rlm['type'] == 'PLB']['country']
+#   fields[5][['index', 'warn_code']]       # fixed fields of the Tsunami reports
+#
+# Types, countries and the DCR header and fixed fields match beacon_info() and
+# decode_dcr(). The DCR repeating groups (entries) and the 80-bit EEW region
+# mask are not columnar, decode_dcr() on dcr['report'] rows gives them.
+import mmap
+import numpy as np
+from beacon_decode import TYPE_TABLE, countries, load_countries
+from dcr_decode import DCR_HEADER, DCR_LAYOUTS, DCR_REPORT
+from ubxframe import RXM_RLM, iter_frames, relevant_frame
+
+# RXM-RLM payload up to the short params, RXM-SFRBX payload up to the 8th dword
+RLM_RAW = np.dtype([('version', 'u1'), ('kind', 'u1'), ('svid', 'u1'), ('reserved', 'u1'),
+                    ('beacon', '>u8'), ('message', 'u1'), ('params', '>u2'), ('reserved1', 'u1')])
+SFRBX_RAW = np.dtype([('gnss', 'u1'), ('svid', 'u1'), ('sigid', 'u1'), ('freqid', 'u1'), ('numwords', 'u1'),
+                      ('chn', 'u1'), ('version', 'u1'), ('reserved', 'u1'), ('dwords', '<u4', (8,))])
+
+# the type and country columns are as wide as their longest name
+RLM_COLUMNS = [('file', 'u2'), ('offset', 'u8'), ('svid', 'u1'), ('long', '?'), ('hexid', 'u8'),
+               ('message', 'u1'), ('country_code', 'u2')]
+DCR_COLUMNS = np.dtype([('file', 'u2'), ('offset', 'u8'), ('svid', 'u1'), ('report', 'u8')]
+                       + [(name, 'u1') for name, start, end in DCR_HEADER + DCR_REPORT])
+
+
+def scan(data, file=0):
+    # -> (RLM payloads, DC Report payloads, their (file, offset) rows) of one capture
+    rlm = bytearray()
+    dcr = bytearray()
+    rlm_pos = []
+    dcr_pos = []
+    for pos, frame in iter_frames(data):
+        if not relevant_frame(frame):
+            continue
+        if frame[2:4] == RXM_RLM:
+            if len(frame) >= 8 + RLM_RAW.itemsize:
+                rlm += frame[6:6 + RLM_RAW.itemsize]
+                rlm_pos.append((file, pos))
+        elif frame[2] == 0x02 and len(frame) >= 8 + SFRBX_RAW.itemsize:     # SFRBX, not NAV-SAT
+            dcr += frame[6:6 + SFRBX_RAW.itemsize]
+            dcr_pos.append((file, pos))
+    return (np.frombuffer(rlm, RLM_RAW), np.frombuffer(dcr, SFRBX_RAW),
+            np.array(rlm_pos, 'u8').reshape(-1, 2), np.array(dcr_pos, 'u8').reshape(-1, 2))
+
+def country_names():
+    # country code -> name for all 1024 codes, as beacon_info() reports them
+    if not countries:
+        load_countries()
+    return np.array([countries.get(code, 'UNKNOWN') for code in range(1024)])
+
+def rlm_columns(raw, pos):
+    types = np.array(TYPE_TABLE)
+    names = country_names()
+    out = np.zeros(len(raw), RLM_COLUMNS + [('type', types.dtype), ('country', names.dtype)])
+    out['file'] = pos[:, 0]
+    out['offset'] = pos[:, 1]
+    out['svid'] = raw['svid']
+    out['long'] = raw['kind'] == 2
+    hexid = raw['beacon'] & np.uint64((1 << 60) - 1)     # the first hex digit is not part of the HEXID
+    out['hexid'] = hexid
+    out['message'] = raw['message']
+    code = (hexid >> np.uint64(49)) & np.uint64(0x3FF)
+    key = ((hexid >> np.uint64(49)) & np.uint64(0x400)) | ((hexid >> np.uint64(39)) & np.uint64(0x3FF))
+    out['type'] = types[key]
+    out['country_code'] = code
+    out['country'] = names[code]
+    return out
+
+def bits(words, start, end):
+    # bits start..end (from the MSB of the 256-bit message) of every row of
+    # an (n, 8) uint32 array, end - start <= 32
+    i = start // 32
+    pair = words[:, i].astype(np.uint64) << np.uint64(32)
+    if i < 7:
+        pair |= words[:, i + 1]
+    return (pair >> np.uint64(64 - start % 32 - (end - start))) & np.uint64((1 << (end - start)) - 1)
+
+def field_type(width):
+    return 'u1' if width <= 8 else 'u2' if width <= 16 else 'u4'
+
+def dcr_columns(raw, pos):
+    # -> (one row per message, {category: fixed fields of its reports, 'index' into the rows});
+    # for other organizations (msg_type 44) only msg_type, priority and org_code apply
+    words = raw['dwords']
+    out = np.zeros(len(raw), DCR_COLUMNS)
+    out['file'] = pos[:, 0]
+    out['offset'] = pos[:, 1]
+    out['svid'] = raw['svid']
+    out['report'] = bits(words, 8, 40) << np.uint64(1) | bits(words, 40, 41)     # dcr_decode.dcr_id
+    for name, start, end in DCR_HEADER + DCR_REPORT:
+        out[name] = bits(words, start, end)
+    fields = {}
+    reports = out['msg_type'] == 43
+    for category, (layout, group) in DCR_LAYOUTS.items():
+        index = np.flatnonzero(reports & (out['category'] == category))
+        narrow = [(name, start, end) for name, start, end in layout if end - start <= 32]
+        table = np.zeros(len(index), [('index', 'u8')] + [(name, field_type(end - start)) for name, start, end in narrow])
+        table['index'] = index
+        for name, start, end in narrow:
+            table[name] = bits(words[index], start, end)
+        fields[category] = table
+    return out, fields
+
+def load(paths):
+    # captures -> (RLM rows, DC Report rows, {category: fixed fields}), rows in file order
+    if isinstance(paths, str):
+        paths = [paths]
+    parts = []
+    for file, path in enumerate(paths):
+        with open(path, 'rb') as f:
+            if not f.seek(0, 2):
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                parts.append(scan(data, file))
+    if not parts:
+        parts.append(scan(b''))
+    rlm, dcr, rlm_pos, dcr_pos = (np.concatenate(column) for column in zip(*parts))
+    dcr_rows, fields = dcr_columns(dcr, dcr_pos)
+    return rlm_columns(rlm, rlm_pos), dcr_rows, fields
@@ -0,0 +1,389 @@
+# QZSS DC Report decoder.
+# The eight SFRBX dwords form one 256-bit int. Each report category has a
+# declarative layout (fixed fields + an optional repeating group of entries);
+# decode_dcr() extracts every field exactly once into a dict and format_dcr()
+# turns that record into the strings shown in the table and the CSV log.
+# Bit positions are counted from the MSB of the 256-bit message, as in the IS.
+
+dcr_msg_types = {1: 'Earthquake EW',
+                 2: 'Hypocenter',
+                 3: 'Seismic Intensity',
+                 4: 'Nankai Trough Earthquake',
+                 5: 'Tsunami',
+                 6: 'NW Pacific Tsunami',
+                 7: 'Unused',
+                 8: 'Volcano',
+                 9: 'Ash Fall',
+                 10: 'Weather',
+                 11: 'Flood',
+                 12: 'Typhoon',
+                 13: 'Unused',
+                 14: 'Marine'}
+
+dcr_tsunami_height = {1: '<0.2m',
+                      2: '1m',
+                      3: '3m',
+                      4: '5m',
+                      5: '10m',
+                      6: '>10m',
+                      14: 'UNKN',
+                      15: 'other',}
+
+dcr_np_tsunami_height = {1: '0.3m-1m',
+                      2: '1m-3m',
+                      3: '3m-5m',
+                      4: '5m-10m',
+                      508: '>10m',
+                      509: 'high',
+                      510: 'very high',
+                      511: 'UNKN',}
+
+dcr_flood_warn = {1: 'Alarm',
+                  2: 'Warning',
+                  3: 'Risk',
+                  4: 'Occurrence',
+                  15: 'Other'}
+
+dcr_typhoon_scale = {0: 'None',
+                  1: 'Large',
+                  2: 'Extra large',
+                  15: 'Other'}
+
+dcr_typhoon_intensity = {0: 'None',
+                  1: 'Strong',
+                  2: 'Very strong',
+                  3: 'Ferocious',
+                  15: 'Other'}
+
+dcr_marine_warncode = {0: 'Warning canceled',
+                  10: 'Ice',
+                  11: 'Fog',
+                  12: 'Swell',
+                  20: 'Wind',
+                  21: 'Gale',
+                  22: 'Storm',
+                  23: 'Typhoon',
+                  31: 'Other'}
+
+dcr_weather_type = {1: 'Snow storm',
+                    2: 'Heavy rain',
+                    3: 'Storm',
+                    4: 'Heavy snow',
+                    5: 'Wave warning',
+                    6: 'Storm surge',
+                    7: 'Special warning',
+                    21: 'Record-breaking heavy rain',
+                    22: 'Tornado',
+                    23: 'Landslide',
+                    31: 'Other'}
+
+dcr_seismic_intlow = {1: '0',
+                      2: '1',
+                      3: '2',
+                      4: '3',
+                      5: '4',
+                      6: 'lower 5',
+                      7: 'upper 5',
+                      8: 'lower 6',
+                      9: 'upper 6',
+                      10: '7',
+                      14: 'Nothing',
+                      15: 'UNKN'}
+
+dcr_seismic_inthigh = {1: '0',
+                      2: '1',
+                      3: '2',
+                      4: '3',
+                      5: '4',
+                      6: 'lower 5',
+                      7: 'upper 5',
+                      8: 'lower 6',
+                      9: 'upper 6',
+                      10: '7',
+                      11: '>7',
+                      14: 'Nothing',
+                      15: 'UNKN'}
+
+DCR_BITS = 256
+
+# (name, first bit, end bit)
+DCR_HEADER = (('msg_type', 8, 14), ('priority', 14, 17), ('org_code', 17, 23))
+DCR_REPORT = (('category', 17, 21), ('month', 21, 25), ('day', 25, 30), ('hour', 30, 35),
+              ('minute', 35, 41), ('info_type', 41, 43))
+
+# category -> (fields, repeating group)
+# group: (first bit, entry size, max entries, fields relative to the entry);
+# the list of entries ends at the first all-zero entry.
+DCR_LAYOUTS = {
+    1: ((('dp1', 53, 62), ('dp2', 62, 71), ('dp3', 71, 80), ('eq_day', 80, 85), ('eq_hour', 85, 90),
+         ('eq_minute', 90, 96), ('depth', 96, 105), ('magnitude', 105, 112), ('region', 112, 122),
+         ('int_low', 122, 126), ('int_high', 126, 130), ('region_mask', 130, 210)), None),
+    2: ((('dp1', 53, 62), ('dp2', 62, 71), ('dp3', 71, 80), ('eq_day', 80, 85), ('eq_hour', 85, 90),
+         ('eq_minute', 90, 96), ('depth', 96, 105), ('magnitude', 105, 112), ('region', 112, 122),
+         ('lat_ns', 122, 123), ('lat_deg', 123, 130), ('lat_min', 130, 136), ('lat_sec', 136, 142),
+         ('lon_ew', 142, 143), ('lon_deg', 143, 151), ('lon_min', 151, 157), ('lon_sec', 157, 163)), None),
+    3: ((('eq_day', 53, 58), ('eq_hour', 58, 63), ('eq_minute', 63, 69)),
+        (69, 9, 16, (('intensity', 0, 3), ('prefecture', 3, 9)))),
+    4: ((('serial', 53, 57),),
+        (57, 8, 18, (('char', 0, 8),))),
+    5: ((('dp1', 53, 62), ('dp2', 62, 71), ('dp3', 71, 80), ('warn_code', 80, 84)),
+        (84, 26, 5, (('tomorrow', 0, 1), ('hour', 1, 6), ('minute', 6, 12), ('height', 12, 16), ('region', 16, 26)))),
+    6: ((('potential', 53, 56),),
+        (56, 28, 5, (('tomorrow', 0, 1), ('hour', 1, 6), ('minute', 6, 12), ('height', 12, 21), ('region', 21, 28)))),
+    8: ((('time_type', 50, 53), ('act_day', 53, 58), ('act_hour', 58, 63), ('act_minute', 63, 69),
+         ('warn_code', 69, 76), ('volcano', 76, 88)),
+        (88, 23, 5, (('local_gov', 0, 23),))),
+    9: ((('act_day', 53, 58), ('act_hour', 58, 63), ('act_minute', 63, 69), ('forecast', 69, 71),
+         ('volcano', 71, 83)),
+        (83, 29, 4, (('hours', 0, 3), ('warn_code', 3, 6), ('local_gov', 6, 29)))),
+    10: ((('state', 53, 56),),
+         (56, 24, 6, (('warn_type', 0, 5), ('region', 5, 24)))),
+    11: ((),
+         (53, 44, 3, (('warn_code', 0, 4), ('region', 4, 44)))),
+    12: ((('ref_day', 53, 58), ('ref_hour', 58, 63), ('ref_minute', 63, 69), ('ref_type', 69, 72),
+          ('elapsed', 80, 87), ('number', 87, 94), ('scale', 94, 98), ('intensity', 98, 102),
+          ('lat_ns', 102, 103), ('lat_deg', 103, 110), ('lat_min', 110, 116), ('lat_sec', 116, 122),
+          ('lon_ew', 122, 123), ('lon_deg', 123, 131), ('lon_min', 131, 137), ('lon_sec', 137, 143),
+          ('pressure', 143, 154), ('wind', 154, 161), ('gust', 161, 168)), None),
+    14: ((),
+         (53, 19, 8, (('warn_code', 0, 5), ('region', 5, 19)))),
+}
+
+
+def compile_fields(fields, width):
+    return tuple((name, width - end, (1 << (end - start)) - 1) for name, start, end in fields)
+
+def compile_layout(fields, group):
+    if group is not None:
+        first, size, count, entry_fields = group
+        group = (DCR_BITS - first - size, size, count, (1 << size) - 1, compile_fields(entry_fields, size))
+    return compile_fields(fields, DCR_BITS), group
+
+HEADER_FIELDS = compile_fields(DCR_HEADER, DCR_BITS)
+REPORT_FIELDS = compile_fields(DCR_REPORT, DCR_BITS)
+LAYOUTS = {category: compile_layout(*layout) for category, layout in DCR_LAYOUTS.items()}
+
+
+def is_dcr_dword(dwrd_01):
+    # first L1S dword carries a DCR (43) or DCX (44) message type
+    return str(bin(dwrd_01)).zfill(32)[10:16] in ('101011', '101100')
+
+def is_dcr_frame(parsed_data):
+    return parsed_data.gnssId == 5 and is_dcr_dword(parsed_data.dwrd_01)
+
+def dcr_bits(dwords):
+    v = 0
+    for dwrd in dwords:
+        v = (v << 32) | dwrd
+    return v
+
+def dcr_id(v):
+    # header bits 8-40 (message type ... report time), identifies a report
+    return (v >> (DCR_BITS - 41)) & ((1 << 33) - 1)
+
+def dcr_key(v):
+    return format(dcr_id(v), '033b')
+
+def dcr_payload(v):
+    # message type and the 212 data bits; the preamble rotates between
+    # broadcasts and the CRC follows it, so copies of a message differ there
+    return (v >> (DCR_BITS - 226)) & ((1 << 218) - 1)
+
+def dcr_info_type(v):
+    # 0 issue, 1 correction, 2 cancellation; other organizations (DCX) have none
+    if (v >> (DCR_BITS - 14)) & 0x3F != 43:
+        return 0
+    return (v >> (DCR_BITS - 43)) & 3
+
+def extract(v, fields, record):
+    for name, shift, mask in fields:
+        record[name] = (v >> shift) & mask
+
+def decode_dcr(v):
+    record = {}
+    extract(v, HEADER_FIELDS, record)
+    if record['msg_type'] == 44:    # DCX, other organization
+        return record
+    del record['org_code']
+    extract(v, REPORT_FIELDS, record)
+    layout = LAYOUTS.get(record['category'])
+    if layout is None:
+        return record
+    fields, group = layout
+    extract(v, fields, record)
+    if group is not None:
+        shift, size, count, mask, entry_fields = group
+        entries = []
+        for i in range(count):
+            entry = (v >> (shift - i * size)) & mask
+            if entry == 0:
+                break
+            item = {}
+            extract(entry, entry_fields, item)
+            entries.append(item)
+        record['entries'] = entries
+    return record
+
+
+REGION_FIELDS = ('region', 'prefecture', 'local_gov')
+
+def dcr_regions(r):
+    # region, prefecture and local government codes named by a decoded report
+    codes = {r[name] for name in REGION_FIELDS if name in r}
+    for entry in r.get('entries', ()):
+        codes.update(entry[name] for name in REGION_FIELDS if name in entry)
+    codes.discard(0)
+    return codes
+
+
+def dict_except(dict,key):
+    try:
+        return dict[key]
+    except KeyError:
+        return 'Err'
+
+def dms(deg, minutes, sec, hemi):
+    return f'{deg}°{minutes}\'{sec}\"{hemi}'
+
+def format_eew(r):
+    tempstr = ''
+    tempstr += f'DP codes: {r["dp1"]}, {r["dp2"]}, {r["dp3"]}.\n'
+    tempstr += f'Time of EQ: {r["eq_hour"]}:{r["eq_minute"]} DoM:{r["eq_day"]}\n'
+    tempstr += f'Depth of epicenter {r["depth"]}. '
+    tempstr += f'Magnitude {r["magnitude"]/10}\n'
+    tempstr += f'Ep. region {r["region"]}. '
+    tempstr += f'Seismic intensity from {dict_except(dcr_seismic_intlow,r["int_low"])} to {dict_except(dcr_seismic_inthigh,r["int_high"])}\n'
+    tempstr += f'Region mask {r["region_mask"]:020x}\n'
+    return tempstr
+
+def format_hypocenter(r):
+    tempstr = ''
+    tempstr += f'DP codes: {r["dp1"]}, {r["dp2"]}, {r["dp3"]}. '
+    tempstr += f'Time of EQ : {r["eq_hour"]}:{r["eq_minute"]} DoM:{r["eq_day"]}\n'
+    tempstr += f'Depth of epicenter {r["depth"]}. '
+    tempstr += f'Magnitude {r["magnitude"]/10}\n'
+    tempstr += f'Seismic epicenter {r["region"]} '
+    tempstr += dms(r['lat_deg'], r['lat_min'], r['lat_sec'], 'S' if r['lat_ns'] else 'N') + ' '
+    tempstr += dms(r['lon_deg'], r['lon_min'], r['lon_sec'], 'W' if r['lon_ew'] else 'E') + ' '
+    return tempstr
+
+def format_intensity(r):
+    tempstr = ''
+    tempstr += f'Time of earthquake : {r["eq_hour"]}:{r["eq_minute"]} DoM:{r["eq_day"]}\n'
+    tempstr += 'Prefecture:Int. : '
+    for e in r['entries']:
+        tempstr += f'{e["prefecture"]}:{e["intensity"]} '
+    return tempstr
+
+def format_nankai(r):
+    tempstr = f'Serial Code: {r["serial"]} Text:\n'
+    # single bytes, anything outside ASCII is not valid UTF-8
+    for e in r['entries']:
+        tempstr += chr(e['char']) if e['char'] < 0x80 else '*'
+    return tempstr
+
+def format_tsunami(r):
+    tempstr = ''
+    tempstr += f'DP codes: {r["dp1"]}, {r["dp2"]}, {r["dp3"]}. '
+    tempstr += f'Warn. Code: {r["warn_code"]}\n'
+    for e in r['entries']:
+        day = 'tomorrow' if e['tomorrow'] else 'today'
+        tempstr += f'Region:{e["region"]}, '
+        tempstr += f'{day} {e["hour"]}:{e["minute"]}, Height: {dict_except(dcr_tsunami_height,e["height"])}\n'
+    return tempstr
+
+def format_np_tsunami(r):
+    tempstr = f'Potential: {r["potential"]}\n'
+    for e in r['entries']:
+        day = 'tomorrow' if e['tomorrow'] else 'today'
+        tempstr += f'Region:{e["region"]}, '
+        tempstr += f'{day} {e["hour"]}:{e["minute"]}, Height: {dict_except(dcr_np_tsunami_height,e["height"])} '
+    return tempstr
+
+def format_volcano(r):
+    tempstr = f'Time type code:{r["time_type"]} '
+    act_time = ' unknown' if r['act_hour'] == 31 and r['act_minute'] == 63 else f'{r["act_hour"]}:{r["act_minute"]} DoM:{r["act_day"]}'
+    tempstr += f'Activity time:{act_time}\n'
+    tempstr += f'Warning code:{r["warn_code"]} '
+    tempstr += f'Volcano name:{r["volcano"]}\n Local Gov.:'
+    for e in r['entries']:
+        tempstr += f'{e["local_gov"]} '
+    return tempstr
+
+def format_ash_fall(r):
+    forecast = '/Preliminary/' if r['forecast'] == 1 else '/Detailed/'
+    tempstr = f'{forecast} Activity Time: {r["act_hour"]}:{r["act_minute"]} DoM:{r["act_day"]}.\nVolcano Name: {r["volcano"]}\n'
+    tempstr += 'Expected ash fall time (hours from act.time):AshfallWarnCode:LocGov:\n'
+    for e in r['entries']:
+        tempstr += f'{e["hours"]}:{e["warn_code"]}:{e["local_gov"]} '
+    return tempstr
+
+def format_weather(r):
+    if r['state'] == 1:
+        ws = 'Announcement'
+    elif r['state'] == 2:
+        ws = 'Release'
+    else: ws = f'Undef.{r["state"]}'
+    tempstr = f'Warning state: {ws}\n'
+    for e in r['entries']:
+        tempstr += f'{e["region"]}:{dict_except(dcr_weather_type,e["warn_type"])} '
+    return tempstr
+
+def format_flood(r):
+    tempstr = 'Region:WarnCode\n'
+    for e in r['entries']:
+        tempstr += f'{e["region"]}:{dict_except(dcr_flood_warn,e["warn_code"])} '
+    return tempstr
+
+def format_typhoon(r):
+    if r['ref_type'] == 1:
+        tempstr = '/Analysis/ '
+    elif r['ref_type'] == 2:
+        tempstr = '/Estimate/ '
+    else: tempstr = '/Forecast/ '
+    tempstr += f'Reference Time: {r["ref_hour"]}:{r["ref_minute"]} DoM:{r["ref_day"]}.\n'
+    tempstr += f'Elapsed time: {r["elapsed"]} hours.'
+    tempstr += f'Typhoon number: {r["number"]}.\n'
+    tempstr += f'Scale category: {dict_except(dcr_typhoon_scale,r["scale"])} '
+    tempstr += f'Intensity category: {dict_except(dcr_typhoon_intensity,r["intensity"])}\n'
+    lat = 'S' if r['lat_ns'] else 'N'
+    tempstr += f'{r["lat_deg"]}°{r["lat_min"]}"{r["lat_sec"]}"{lat} '
+    lon = 'W' if r['lon_ew'] else 'E'
+    tempstr += f'{r["lon_deg"]}°{r["lon_min"]}"{r["lon_sec"]}"{lon}\n'
+    tempstr += f'Central pressure: {r["pressure"]} '
+    tempstr += f'Maximum wind speed: {r["wind"] or "Unknown"} m/s '
+    tempstr += f'Maximum wind gust speed: {r["gust"] or "Unknown"} m/s'
+    return tempstr
+
+def format_marine(r):
+    tempstr = ''
+    for e in r['entries']:
+        tempstr += f'{e["region"]}:{dict_except(dcr_marine_warncode,e["warn_code"])} '
+    return tempstr
+
+FORMATTERS = {1: format_eew,
+              2: format_hypocenter,
+              3: format_intensity,
+              4: format_nankai,
+              5: format_tsunami,
+              6: format_np_tsunami,
+              8: format_volcano,
+              9: format_ash_fall,
+              10: format_weather,
+              11: format_flood,
+              12: format_typhoon,
+              14: format_marine}
+
+def format_dcr(r):
+    # -> PRIORITY, CATEGORY, REPORT TIME, INFO TYPE, INFO columns
+    if r['msg_type'] == 44:
+        return [str(r['priority']), 'OTHER ORG', 'None', 'None', f'Organization code:{r["org_code"]}']
+    if r['info_type'] == 0: info_type = 'Issue'
+    elif r['info_type'] == 1: info_type = 'Correction'
+    else: info_type = 'Cancellation'
+    fmt = FORMATTERS.get(r['category'])
+    return [str(r['priority']),
+            dict_except(dcr_msg_types, r['category']),
+            f'{r["day"]}/{r["month"]} {r["hour"]}:{r["minute"]}',
+            info_type,
+            fmt(r) if fmt else '--------------']
@@ -0,0 +1,119 @@
+# Decoder API for embedding.
+# decode_rlm(), decode_dcr() and decode_navsat() turn one message into a typed
+# event and keep no state; iter_events() frames and decodes any byte source
+# (file, socket, serial port, bytes) and yields the events lazily. Tables, logs,
+# the store and the feed are left to the caller, gnss_addinfo_decoder.py is one
+# such consumer.
+#
+#   from decoder import iter_events, RLMEvent
+#   with open('capture.ubx', 'rb') as f:
+#       for event in iter_events(f):
+#           if isinstance(event, RLMEvent):
+#               print(event.hexid, event.type, event.country)
+import io
+from beacon_decode import beacon_hexid, beacon_info, beacon_key
+from dcr_decode import dcr_bits, dcr_id, decode_dcr as decode_report, format_dcr, is_dcr_frame
+
+# pyubx2 attribute names of the NAV-SAT repeating group, per satellite (numSvs is a U1)
+NAVSAT_FIELDS = [tuple(f'{name}_{i:02}' for name in ('gnssId', 'svId', 'qualityInd', 'cno', 'elev'))
+                 for i in range(1, 256)]
+
+
+class RLMEvent:
+    # one RXM-RLM: key is the beacon field without the non-HEXID bits,
+    # params the parameter bits as a 16 (short RLM) or 96 (long) digit string
+    __slots__ = ('svid', 'key', 'hexid', 'type', 'country', 'message', 'params', 'source', 'arrived')
+
+    def __init__(self, svid, key, message, params, source=None, arrived=None):
+        self.svid = svid
+        self.key = key
+        self.hexid = beacon_hexid(key)
+        self.type, self.country = beacon_info(self.hexid)
+        self.message = message
+        self.params = params
+        self.source = source
+        self.arrived = arrived      # time.monotonic() of the read that completed the frame
+
+
+class DCREvent:
+    # one DC Report: the 256 message bits, keyed like the DCR table by the
+    # header bits; the fields are only decoded when asked for
+    __slots__ = ('svid', 'bits', 'key', 'source', 'arrived', '_record')
+
+    def __init__(self, svid, bits, source=None, arrived=None):
+        self.svid = svid
+        self.bits = bits
+        self.key = dcr_id(bits)
+        self.source = source
+        self.arrived = arrived
+        self._record = None
+
+    @property
+    def record(self):
+        # field name -> value, see dcr_decode.decode_dcr
+        if self._record is None:
+            self._record = decode_report(self.bits)
+        return self._record
+
+    def columns(self):
+        # PRIORITY, CATEGORY, REPORT TIME, INFO TYPE, INFO as in the table and log
+        return format_dcr(self.record)
+
+
+class NavSatEvent:
+    # satellites in view as (gnssId, svId, qualityInd, cno, elev)
+    __slots__ = ('svs', 'source', 'arrived')
+
+    def __init__(self, svs, source=None, arrived=None):
+        self.svs = svs
+        self.source = source
+        self.arrived = arrived
+
+
+def decode_rlm(frame, source=None, arrived=None):
+    # frame: parsed RXM-RLM (pyubx2 UBXMessage or anything with its attributes)
+    width = 16 if frame.type == 1 else 96
+    return RLMEvent(frame.svId, beacon_key(frame.beacon), frame.message,
+                    bin(frame.params)[2:].zfill(width), source, arrived)
+
+def decode_dcr(dwords, svid, source=None, arrived=None):
+    # dwords: the eight RXM-SFRBX data words of a QZSS L1S DC Report subframe
+    return DCREvent(svid, dcr_bits(dwords), source, arrived)
+
+def decode_navsat(frame, source=None, arrived=None):
+    return NavSatEvent(tuple(tuple(getattr(frame, name) for name in names) for names in NAVSAT_FIELDS[:frame.numSvs]),
+                       source, arrived)
+
+def decode_message(parsed_data, source=None, arrived=None):
+    # any parsed UBX message -> event, None if it is not one of ours
+    identity = parsed_data.identity
+    if identity == 'RXM-RLM':
+        return decode_rlm(parsed_data, source, arrived)
+    if identity == 'RXM-SFRBX' and is_dcr_frame(parsed_data):
+        return decode_dcr([getattr(parsed_data, f'dwrd_{i+1:02}') for i in range(8)],
+                          parsed_data.svId, source, arrived)
+    if identity == 'NAV-SAT':
+        return decode_navsat(parsed_data, source, arrived)
+    return None
+
+
+def byte_stream(byte_source):
+    # bytes, anything with read() (file, serial.Serial, RingBuffer) or a socket
+    if isinstance(byte_source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(byte_source)
+    if hasattr(byte_source, 'read'):
+        return byte_source
+    if hasattr(byte_source, 'recv'):
+        return byte_source.makefile('rb', buffering=0)     # unbuffered: returns what has arrived
+    raise TypeError(f'not a byte source: {type(byte_source).__name__}')
+
+def iter_events(byte_source, source=None, metrics=None):
+    # yields RLMEvent, DCREvent and NavSatEvent in stream order until a read
+    # returns no data (end of file, closed socket, serial read timeout); the
+    # framer skips everything else unparsed
+    from ubxframe import UBXFramer      # pyubx2, not needed by the decode_* functions
+    framer = UBXFramer(byte_stream(byte_source), metrics=metrics)
+    for (raw_data, parsed_data) in framer:
+        event = decode_message(parsed_data, source, framer.arrived)
+        if event is not None:
+            yield event
@@ -0,0 +1,151 @@
+# Local NDJSON event feed.
+# Listens on a TCP (host:port) or Unix socket; every connected client gets
+# each published event as one line of JSON. Events are encoded once and put on
+# a bounded queue per client that its own thread drains, so a client that falls
+# behind loses events (counted per client) instead of holding up decoding.
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque
+
+
+def listen(address):
+    # 'host:port' or ':port' (localhost) -> TCP, anything else is a Unix socket path
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        sock = socket.create_server((host or '127.0.0.1', int(port)))
+    else:
+        if os.path.exists(address):
+            os.unlink(address)      # left over from an earlier run
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(address)
+        sock.listen()
+    return sock
+
+
+class LatencyStats:
+    # frame arrival -> emit latency over the last `window` events
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.max = max(self.max, seconds)
+
+    def summary(self):
+        # milliseconds; percentiles over the window, max since start
+        with self.lock:
+            samples = sorted(self.samples)
+            count, top = self.count, self.max
+        if not samples:
+            return {'count': 0}
+        return {'count': count,
+                'mean_ms': sum(samples) / len(samples) * 1e3,
+                'p50_ms': samples[len(samples) // 2] * 1e3,
+                'p99_ms': samples[min(len(samples) - 1, len(samples) * 99 // 100)] * 1e3,
+                'max_ms': top * 1e3}
+
+
+class Subscriber:
+    def __init__(self, conn, peer, queue_size):
+        self.conn = conn
+        self.peer = peer
+        self.queue = queue.Queue(queue_size)
+        self.dropped = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name=f'feed-{peer}', daemon=True)
+
+    def send(self, data):
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        try:
+            while True:
+                data = self.queue.get()
+                if data is None:
+                    break
+                self.conn.sendall(data)
+        except OSError:     # client went away
+            pass
+        finally:
+            self.closed = True
+            self.conn.close()
+
+    def stop(self):
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            self.conn.shutdown(socket.SHUT_RDWR)
+
+
+class EventFeed:
+    def __init__(self, address, queue_size=1000):
+        self.address = address
+        self.queue_size = queue_size
+        self.sock = listen(address)
+        self.subscribers = []
+        self.published = 0
+        self.lost = 0           # events dropped for clients that have left
+        self.latency = LatencyStats()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.accept, name='feed', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def accept(self):
+        while True:
+            try:
+                conn, peer = self.sock.accept()
+            except OSError:     # listening socket closed
+                return
+            if conn.family != socket.AF_UNIX:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = Subscriber(conn, peer or 'unix', self.queue_size)
+            subscriber.thread.start()
+            with self.lock:
+                self.subscribers.append(subscriber)
+
+    def publish(self, event, arrived=None):
+        # arrived: time.monotonic() of the read that completed the UBX frame
+        data = (json.dumps(event, separators=(',', ':')) + '\n').encode()
+        with self.lock:
+            if any(s.closed for s in self.subscribers):
+                self.lost += sum(s.dropped for s in self.subscribers if s.closed)
+                self.subscribers = [s for s in self.subscribers if not s.closed]
+            subscribers = self.subscribers
+        for subscriber in subscribers:
+            subscriber.send(data)
+        self.published += 1
+        if arrived is not None:
+            self.latency.add(time.monotonic() - arrived)
+
+    def dropped(self):
+        with self.lock:
+            return self.lost + sum(s.dropped for s in self.subscribers)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)    # wakes up accept()
+        except OSError:
+            pass
+        self.sock.close()
+        with self.lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for subscriber in subscribers:
+            subscriber.stop()
+        for subscriber in subscribers:
+            subscriber.thread.join(1)
+        if self.sock.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
@@ -1,409 +1,430 @@
-from serial import Serial
-from pyubx2 import UBXReader
-from pyubx2 import UBXMessage, SET
-from datetime import datetime
 import time
-from rich.live import Live
-from rich.table import Table
-from rich import box
-from rich import print
-from rich.layout import Layout
-import csv
 import os
 import argparse
-from bitstring import BitArray
-tab = []
-dcr_tab = []
+import glob
+import atexit
+from tables import NEW, REPEAT, STALE, Beacon, Report, RecordTable
+from render import RenderScheduler, RowCache
+from logsink import CsvSink, SinkFlusher, timestamp
+from metrics import Metrics, MetricsWriter, serve
+from beacon_decode import beacon_hexid, load_countries
+from dcr_decode import decode_dcr, format_dcr
+from decoder import DCREvent, RLMEvent, decode_message
+from sky import LOCKED, Sky
 gal_str = ''
 qzss_str = ''
-reset_time = int(time.time())
+skies = {}          # receiver -> Sky
+locked_sats = {}
+
+# set up by main()
+args = None
+metrics = None
+tab = None          # beacon key -> Beacon
+dcr_tab = None      # DCR header bits -> Report
+multi_rx = False    # record the receiver of each row
+rlm_log = None
+dcr_log = None
+store = None
+feed = None
+renderer = None
 
 parser = argparse.ArgumentParser(description='RLS/DCR message decoder')
-parser.add_argument('serialport', type=str, help='U-blox receiver COM-port')
+parser.add_argument('serialport', type=str, nargs='*', help='U-blox receiver COM-port(s) or .ubx capture files, read concurrently')
 parser.add_argument('--out_rlm_file', type=str, help='RLM CSV log file', default='RLM_log.csv')
 parser.add_argument('--out_dcr_file', type=str, help='DCR CSV log file', default='DCR_log.csv')
 parser.add_argument('--hide_qzss', type=str, help='hide QZSS DCR table', action=argparse.BooleanOptionalAction)
 parser.add_argument('--hide_rlm', type=str, help='hide RLM table', action=argparse.BooleanOptionalAction)
 parser.add_argument('--autoconf', type=str, help='receiver autoconfiguration', action=argparse.BooleanOptionalAction)
-parser.add_argument('--autodel', type=int, help='delete tables every 6 hours', action=argparse.BooleanOptionalAction)
-
-args = parser.parse_args()
-
-dcr_msg_types = {1: 'Earthquake EW',
-                 2: 'Hypocenter',
-                 3: 'Seismic Intensity',
-                 4: 'Nankai Trough Earthquake',
-                 5: 'Tsunami',
-                 6: 'NW Pacific Tsunami',
-                 7: 'Unused',
-                 8: 'Volcano',
-                 9: 'Ash Fall',
-                 10: 'Weather',
-                 11: 'Flood',
-                 12: 'Typhoon',
-                 13: 'Unused',
-                 14: 'Marine'}
-
-dcr_tsunami_height = {1: '<0.2m',
-                      2: '1m',
-                      3: '3m',
-                      4: '5m',
-                      5: '10m',
-                      6: '>10m',
-                      14: 'UNKN',
-                      15: 'other',}
-
-dcr_np_tsunami_height = {1: '0.3m-1m',
-                      2: '1m-3m',
-                      3: '3m-5m',
-                      4: '5m-10m',
-                      508: '>10m',
-                      509: 'high',
-                      510: 'very high',
-                      511: 'UNKN',}
-
-dcr_flood_warn = {1: 'Alarm',
-                  2: 'Warning',
-                  3: 'Risk',
-                  4: 'Occurrence',
-                  15: 'Other'}
-
-dcr_typhoon_scale = {0: 'None',
-                  1: 'Large',
-                  2: 'Extra large',
-                  15: 'Other'}
-
-dcr_typhoon_intensity = {0: 'None',
-                  1: 'Strong',
-                  2: 'Very strong',
-                  3: 'Ferocious',
-                  15: 'Other'}
-
-dcr_marine_warncode = {0: 'Warning canceled',
-                  10: 'Ice',
-                  11: 'Fog',
-                  12: 'Swell',
-                  20: 'Wind',
-                  21: 'Gale',
-                  22: 'Storm',
-                  23: 'Typhoon',
-                  31: 'Other'}
-
-dcr_weather_type = {1: 'Snow storm',
-                    2: 'Heavy rain',
-                    3: 'Storm',
-                    4: 'Heavy snow',
-                    5: 'Wave warning',
-                    6: 'Storm surge',
-                    7: 'Special warning',
-                    21: 'Record-breaking heavy rain',
-                    22: 'Tornado',
-                    23: 'Landslide',
-                    31: 'Other'}
-
-dcr_seismic_intlow = {1: '0',
-                      2: '1',
-                      3: '2',
-                      4: '3',
-                      5: '4',
-                      6: 'lower 5',
-                      7: 'upper 5',
-                      8: 'lower 6',
-                      9: 'upper 6',
-                      10: '7',
-                      14: 'Nothing',
-                      15: 'UNKN'}
-
-dcr_seismic_inthigh = {1: '0',
-                      2: '1',
-                      3: '2',
-                      4: '3',
-                      5: '4',
-                      6: 'lower 5',
-                      7: 'upper 5',
-                      8: 'lower 6',
-                      9: 'upper 6',
-                      10: '7',
-                      11: '>7',
-                      14: 'Nothing',
-                      15: 'UNKN'}
-
-
-with open('country.csv') as f:
-    countrylist = csv.DictReader(f, delimiter=';')
-    countrydict = {rows['Code']:rows['Country'] for rows in countrylist}
-
-if not os.path.isfile(args.out_rlm_file):
-    with open(args.out_rlm_file, 'w', newline='\n') as csvfile:
-        rlmlog = csv.writer(csvfile, delimiter=';')
-        rlmlog.writerow(['SAT', 'BEACON HEXID', 'TYPE', 'COUNTRY', 'SEEN', 'Message', 'Params'])
-
-if not os.path.isfile(args.out_dcr_file):
-    with open(args.out_dcr_file, 'w', newline='\n') as csvfile:
-        rlmlog = csv.writer(csvfile, delimiter=';')
-        rlmlog.writerow(['RECEIPT TIME', 'SAT', 'PRIORITY', 'CATEGORY', 'REPORT TIME', 'INFO TYPE', 'INFO'])
-
-def country_decode (beacon) :
-    t = bin(int(beacon, 16))[2:].zfill(60)
-    t = t[1:11]
-    try:
-        country = countrydict[str(int(t,2))]
-        return country
-    except KeyError:
-        return "UNKNOWN"
-
-def dict_except(dict,key):
-    try:
-        return dict[key]
-    except KeyError:
-        return 'Err'
-
-def beacon_type(beacon) :
-    t = bin(int(beacon, 16))[2:].zfill(60)
-    if t[0] == '1' :
-        match t[11:14] :
-            case '010' | '110':
-                return 'EPIRB'
-            case '111' :
-                return 'TEST'
-            case '000' :
-                return 'ORB'
-            case '001' :
-                return 'ELT'
-            case '011' :
-                match t[14:17] :
-                    case '000' | '001' | '011':
-                        return 'ELT'
-                    case '010' | '100' :
-                        return 'EPIRB'
-                    case '110' :
-                        return 'PLB'
-                    case _ :
-                        return "UNDEF"
-            case '100' :
-                return 'NUP'
-            case '101' :
-                return 'SGB'
-            case _:
-                return 'UNDEF'
+parser.add_argument('--autodel', type=int, help='drop rows first seen more than 6 hours ago (same as --max_age 6)', action=argparse.BooleanOptionalAction)
+parser.add_argument('--max_rows', type=int, help='keep at most this many rows per table, least recently seen are dropped first')
+parser.add_argument('--max_age', type=float, help='drop rows first seen more than this many hours ago')
+parser.add_argument('--row_ttl', type=float, help='drop rows not seen for this many hours')
+parser.add_argument('--log_flush_rows', type=int, help='write CSV logs after this many buffered rows', default=100)
+parser.add_argument('--log_flush_sec', type=float, help='write buffered CSV rows at least this often (s)', default=2)
+parser.add_argument('--log_fsync_sec', type=float, help='fsync CSV logs at most this often (s), default only on exit')
+parser.add_argument('--log_rotate_mb', type=float, help='rotate CSV logs when they exceed this size (MB)')
+parser.add_argument('--log_rotate_daily', help='rotate CSV logs at midnight', action=argparse.BooleanOptionalAction)
+parser.add_argument('--db', type=str, help='also record every message in this SQLite event store and start the tables from it (--replay then decodes serially)')
+parser.add_argument('--feed', type=str, metavar='ADDRESS', help='publish beacons and DC reports as NDJSON on host:port (TCP) or a Unix socket path')
+parser.add_argument('--feed_queue', type=int, help='events buffered per feed client before they are dropped', default=1000)
+parser.add_argument('--metrics', type=str, metavar='HOST:PORT', help='serve timing and counter metrics (Prometheus text format) over HTTP')
+parser.add_argument('--metrics_file', type=str, help='write the metrics to this file every --metrics_sec seconds')
+parser.add_argument('--metrics_sec', type=float, help='metrics file update interval (s)', default=10)
+parser.add_argument('--profile', type=str, metavar='FILE', help='write cProfile stats of the decoding thread to FILE on exit (python -m pstats FILE)')
+parser.add_argument('--ring_kb', type=int, help='per-port receive buffer (KiB); bytes arriving while it is full are dropped', default=1024)
+parser.add_argument('--tee', type=str, metavar='FILE', help='copy the raw serial data to this .ubx file for later --replay')
+parser.add_argument('--tee_rotate_mb', type=float, help='start a new --tee file when it exceeds this size (MB)')
+parser.add_argument('--fps', type=float, help='maximum table redraws per second', default=2)
+parser.add_argument('--archive', type=str, metavar='FILE', help='keep the RLM, DCR and (thinned) NAV-SAT frames in this compressed, time-indexed .ubxz archive')
+parser.add_argument('--archive_navsat_sec', type=float, help='keep one NAV-SAT frame every this many seconds in --archive', default=60)
+parser.add_argument('--replay', type=str, nargs='+', metavar='CAPTURE', help='decode recorded .ubx/.ubxz files, directories or globs without TUI')
+parser.add_argument('--since', type=timestamp, help='replay .ubxz archives from this ISO date/time (not raw .ubx captures, they have no time index)')
+parser.add_argument('--until', type=timestamp, help='replay .ubxz archives up to this ISO date/time (exclusive, not raw .ubx captures)')
+parser.add_argument('--jobs', type=int, help='decode --replay captures in N worker processes (0 = all cores)', default=1)
+
+def open_table():
+    max_age = args.max_age if args.max_age is not None else (6 if args.autodel else None)
+    return RecordTable(max_rows=args.max_rows,
+                       max_age=max_age * 3600 if max_age is not None else None,
+                       ttl=args.row_ttl * 3600 if args.row_ttl is not None else None)
+
+def open_log(path, header):
+    rotate_bytes = int(args.log_rotate_mb * 1024 * 1024) if args.log_rotate_mb else None
+    return CsvSink(path, header, max_rows=args.log_flush_rows, max_delay=args.log_flush_sec,
+                   fsync_every=args.log_fsync_sec, rotate_bytes=rotate_bytes, rotate_daily=args.log_rotate_daily,
+                   metrics=metrics)
+
+def seen_str(t):
+    return time.strftime("%H:%M %d-%m", time.localtime(t))
+
+def new_row(event):
+    now = int(time.time())
+    row = Beacon(event.key, event.svid, now, event.source)
+    tolog = [row.svid, event.hexid.upper(), row.type, row.country, seen_str(now)]
+    tolog.append(bin(event.message)[2:].zfill(4))
+    tolog.append(event.params)
+    if multi_rx: tolog.append(event.source)
+    rlm_log.write(tolog)
+    return row
+
+def dcr_log_row(event, now):
+    # every distinct message once: new reports, further parts, corrections
+    tolog = [seen_str(now), str(event.svid)] + event.columns()
+    if multi_rx: tolog.append(event.source)
+    dcr_log.write(tolog)
+
+def format_rlm_row(row):
+    hexid = beacon_hexid(row.key).upper()
+    if row.type in ('ORB', 'TEST', 'RLS/TEST EPIRB', 'RLS/TEST') :
+        hextid = '[bold][steel_blue1]' + hexid + '[/steel_blue1][/bold]'
     else:
-        match t[11:15] :
-            case '0010' | '1010' | '0110':
-                return 'EPIRB'
-            case '0011' | '0100' | '0101' | '1000' | '1001' :
-                return 'ELT'
-            case '0111' | '1011' :
-                return 'PLB'
-            case '1100' :
-                return 'ShipSec'
-            case '1110' | '1111' :
-                return 'TEST'
-            case '1101' :
-                if t[17:21] == '1111':
-                    if t[15:17] == '00': return 'RLS/1st EPIRB'
-                    elif t[15:17] == '01': return 'RLS/2nd EPIRB'
-                    elif t[15:17] == '10': return 'RLS/PLB EPIRB'
-                    else: return 'RLS/TEST EPIRB'
-                else:
-                    if t[15:17] == '00': return 'RLS/ELT'
-                    elif t[15:17] == '01': return 'RLS/EPIRB'
-                    elif t[15:17] == '10': return 'RLS/PLB'
-                    else: return 'RLS/TEST'
-            case _:
-                return 'UNDEF'
-            
-def new_row(parsed_data,s) :
-    temprow = []
-    now = datetime.now().strftime("%H:%M %d-%m")
-    temprow.append(parsed_data.svId)
-    temprow.append(s.upper())
-    temprow.append(beacon_type(s))
-    temprow.append(country_decode(s))
-    temprow.append(str(now))
-    temprow.append(1)
-    tolog = temprow[:-1]
-    tolog.append(bin(parsed_data.message)[2:].zfill(4))
-    if parsed_data.type == 1:
-        tolog.append(bin(parsed_data.params)[2:].zfill(16))
-    else: tolog.append(bin(parsed_data.params)[2:].zfill(96))
-    with open(args.out_rlm_file, 'a', newline='') as csvfile:
-        writer_object = csv.writer(csvfile, delimiter=';')
-        writer_object.writerow(tolog)
-    return temprow
-
-def dcr_parse_row(dcr_bin_str,svid) :
-    dcr_row =[]
-    dcr_row.append(str(datetime.now().strftime("%H:%M %d-%m")))
-    dcr_row.append(str(svid))
-    btod = lambda s, po : str(dcr_bin_str[s:po].uint)
-    dcr_row.append(btod(14,17))
-    if btod(8,14) == '44':
-       dcr_row.append('OTHER ORG')
-       dcr_row.append('None')
-       dcr_row.append('None')
-       dcr_row.append(f'Organization code:{btod(17,23)}')
-       dcr_row.append(dcr_bin_str.bin[8:41])
-       return dcr_row
-    dcr_row.append(dict_except(dcr_msg_types,dcr_bin_str[17:21].uint))
-    string = f'{btod(25,30)}/{btod(21,25)} {btod(30,35)}:{btod(35,41)}'
-    dcr_row.append(string)
-    if dcr_bin_str[41:43].uint == 0 : dcr_row.append('Issue')
-    elif dcr_bin_str[41:43].uint == 1: dcr_row.append('Correction')
-    else: dcr_row.append('Cancellation')
-    match dcr_bin_str[17:21].uint:
-        case 1 :    # Earthquake Early Warning
-            tempstr = ''
-            tempstr += f'DP codes: {btod(53,62)}, {btod(62,71)}, {btod(71,80)}.\n'
-            tempstr += f'Time of EQ: {btod(85,90)}:{btod(90,96)} DoM:{btod(80,85)}\n'
-            tempstr += f'Depth of epicenter {btod(96,105)}. '
-            tempstr += f'Magnitude {str(dcr_bin_str[105:112].uint/10)}\n'
-            tempstr += f'Ep. region {btod(112,122)}. '
-            tempstr += f'Seismic intensity from {dict_except(dcr_seismic_intlow,dcr_bin_str[122:126].uint)} to {dict_except(dcr_seismic_inthigh,dcr_bin_str[126:130].uint)}\n'
-            tempstr += f'Region mask {dcr_bin_str[130:210].hex}\n'
-            dcr_row.append(tempstr)
-        case 2 :    # Hypocenter
-            tempstr = ''
-            tempstr += f'DP codes: {dcr_bin_str[53:62].uint}, {dcr_bin_str[62:71].uint}, {dcr_bin_str[71:80].uint}. '
-            tempstr += f'Time of EQ : {btod(85,90)}:{btod(90,96)} DoM:{btod(80,85)}\n'
-            tempstr += f'Depth of epicenter {btod(96,105)}. '
-            tempstr += f'Magnitude {str(dcr_bin_str[105:112].uint/10)}\n'
-            tempstr += f'Seismic epicenter {btod(112,122)} '
-            lat = 'N' if dcr_bin_str[122:123].bin == '0' else 'S'
-            tempstr += f'{btod(123,130)}°{btod(130,136)}\'{btod(136,142)}\"{lat} '
-            lon = 'E' if dcr_bin_str[142:143].bin == '0' else 'W' 
-            tempstr += f'{btod(143,151)}°{btod(151,157)}\'{btod(157,163)}\"{lon} '
-            dcr_row.append(tempstr)
-        case 3 :    # Seismic Intensity
-            tempstr = ''
-            tempstr += f'Time of earthquake : {btod(58,63)}:{btod(63,69)} DoM:{btod(53,58)}\n'
-            tempstr += 'Prefecture:Int. : '
-            for i in range(16) :
-                if btod(69+i*9,78+i*9) == '0':
-                    break
-                intens = 69+i*9
-                reg = 72+i*9
-                tempstr += f'{btod(reg,reg+6)}:{btod(intens,intens+3)} '
-            dcr_row.append(tempstr)
-        case 4:     # Nankai Trough Earthquake
-             tempstr = ''
-             tempstr += f'Serial Code: {btod(53,57)} Text:\n'
-             for i in range(18):
-                if btod(57+i*8,65+i*8) == '0':
-                    break
-                try:
-                     chart = bytes.fromhex(dcr_bin_str[57+i*8:65+i*8].hex).decode("utf-8")
-                except UnicodeDecodeError:
-                    chart = '*'
-                tempstr += chart
-             dcr_row.append(tempstr)
-        case 5:     # Tsunami
-             tempstr = ''
-             tempstr += f'DP codes: {btod(53,62)}, {btod(62,71)}, {btod(71,80)}. '
-             tempstr += f'Warn. Code: {btod(80,84)}\n'
-             for i in range(5):
-                if btod(84+i*26,110+i*26) == '0':
-                    break 
-                tempstr += f'Region:{btod(100+i*26,110+i*26)}, '               
-                day = 'today' if btod(84+i*26,85+i*26) == '0' else 'tomorrow'
-                tempstr += f'{day} {btod(85+i*26,90+i*26)}:{btod(90+i*26,96+i*26)}, Height: {dict_except(dcr_tsunami_height,dcr_bin_str[96+i*26:100+i*26].uint)}\n'   
-             dcr_row.append(tempstr)
-        case 6:     # Northwest Pacific Tsunami
-            tempstr = ''
-            tempstr += f'Potential: {btod(53,56)}\n'
-            for i in range(5):
-                if btod(56+i*28,84+i*28) == '0':
-                    break 
-                tempstr += f'Region:{btod(77+i*28,84+i*28)}, '
-                day = 'today' if btod(56+i*28,57+i*28) == '0' else 'tomorrow'
-                tempstr += f'{day} {btod(57+i*28,62+i*28)}:{btod(62+i*28,68+i*28)}, Height: {dict_except(dcr_np_tsunami_height,dcr_bin_str[68+i*28:77+i*28].uint)} '
-
-            dcr_row.append(tempstr)
-        case 8:     # Volcano
-            tempstr = ''
-            tempstr += f'Time type code:{btod(50,53)} '
-            act_time = ' unknown' if btod(58,63) == '31' and btod(63,69) == '63' else f'{btod(58,63)}:{btod(63,69)} DoM:{btod(53,58)}'
-            tempstr += f'Activity time:{act_time}\n'
-            tempstr += f'Warning code:{btod(69,76)} '
-            tempstr += f'Volcano name:{btod(76,88)}\n Local Gov.:'
-            for i in range(5):
-                if btod(88+i*23,111+i*23) == '0':
-                    break                 
-                tempstr += f'{btod(88+i*23,111+i*23)} '
-            dcr_row.append(tempstr)
-        case 9:     # Ash Fall
-            tempstr = ''
-            forecast = '/Preliminary/' if btod(69,71) == '1' else '/Detailed/'
-            tempstr += f'{forecast} Activity Time: {btod(58,63)}:{btod(63,69)} DoM:{btod(53,58)}.\nVolcano Name: {btod(71,83)}\n'
-            tempstr += 'Expected ash fall time (hours from act.time):AshfallWarnCode:LocGov:\n'
-            for i in range(4):
-                if btod(83+i*29,112+i*29) == '0':
-                    break                
-                tempstr += f'{btod(83+i*29,86+i*29)}:{btod(86+i*29,89+i*29)}:{btod(89+i*29,112+i*29)} '
-            dcr_row.append(tempstr)
-        case 10:    # Weather
-            ws = ''
-            if btod(53,56) == '1': 
-                ws = 'Announcement'
-            elif btod(53,56) == '2':
-                ws = 'Release'
-            else : ws = f'Undef.{btod(53,56)}'
-            tempstr = f'Warning state: {ws}\n'
-            for i in range(6):
-                if (btod(56+i*24,61+i*24) == '0') and (btod(61+i*24,80+i*24) == '0'): break
-                tempstr += f'{btod(61+i*24,80+i*24)}:{dict_except(dcr_weather_type,dcr_bin_str[56+i*24:61+i*24].uint)} '
-            dcr_row.append(tempstr)
-        case 11:    # Flood
-            tempstr = 'Region:WarnCode\n'
-            for i in range(3):
-                if (btod(57+i*44,97+i*44) == '0') and (btod(53+i*44,57+i*44) == '0'): break
-                tempstr += f'{btod(57+i*44,97+i*44)}:{dict_except(dcr_flood_warn,dcr_bin_str[53+i*44:57+i*44].uint)} '
-            dcr_row.append(tempstr)
-        case 12:    # Typhoon
-            tempstr = ''
-            if btod(69,72) == '1':
-                tempstr += '/Analysis/ '
-            elif btod(69,72) == '2':
-                tempstr += '/Estimate/ '
-            else: tempstr += '/Forecast/ '            
-            tempstr += f'Reference Time: {btod(58,63)}:{btod(63,69)} DoM:{btod(53,58)}.\n'
-            tempstr += f'Elapsed time: {btod(80,87)} hours.'
-            tempstr += f'Typhoon number: {btod(87,94)}.\n'
-            tempstr += f'Scale category: {dict_except(dcr_typhoon_scale,dcr_bin_str[94:98].uint)} '
-            tempstr += f'Intensity category: {dict_except(dcr_typhoon_intensity,dcr_bin_str[98:102].uint)}\n'
-            lat = 'N' if dcr_bin_str[102:103].bin == '0' else 'S'
-            tempstr += f'{btod(103,110)}°{btod(110,116)}"{btod(116,122)}"{lat} '
-            lon = 'E' if dcr_bin_str[122:123].bin == '0' else 'W' 
-            tempstr += f'{btod(123,131)}°{btod(131,137)}"{btod(137,143)}"{lon}\n'
-            tempstr += f'Central pressure: {btod(143,154)} '
-            tempstr += 'Maximum wind speed: '
-            if btod(154,161) == '0' : tempstr += 'Unknown'    
-            else:  tempstr += btod(154,161)
-            tempstr += ' m/s '    
-            tempstr += 'Maximum wind gust speed: '
-            if btod(161,168) == '0' : tempstr += 'Unknown'    
-            else:  tempstr += btod(161,168)
-            tempstr += ' m/s'
-            dcr_row.append(tempstr)
-        case 14:    # Marine
-            tempstr = ''
-            for i in range(8):
-                if (btod(53+i*19,72+i*19) == '0'): break
-                tempstr += f'{btod(58+i*19,72+i*19)}:{dict_except(dcr_marine_warncode,dcr_bin_str[53+i*19:58+i*19].uint)} '
-            dcr_row.append(tempstr)
+        hextid = '[bold][red on white]' + hexid + '[/red on white][/bold]'
+    cells = (str(row.svid), hextid, row.type, row.country, seen_str(row.last_seen), str(row.count))
+    if multi_rx:
+        return cells + (row.source,)
+    return cells
+
+def report_columns(row):
+    # PRIORITY, CATEGORY, REPORT TIME, INFO TYPE of the report and the INFO of all its parts
+    cols = format_dcr(decode_dcr(row.bits))
+    for bits in row.parts[1:]:
+        cols[4] += '\n' + format_dcr(decode_dcr(bits))[4]
+    return cols
+
+def format_dcr_row(row):
+    cols = report_cols.get(row.key, row)
+    match cols[0] :
+        case '1' :
+            tp = '[bold][red1]MAX[/red1][/bold]'
+        case '2' :
+            tp = '[bold][gold3]PRIORITY[/gold3][/bold]'
+        case '3' :
+            tp = '[bold][blue]REGULAR[/blue][/bold]'
+        case '7' :
+            tp = 'TRNG/TEST'
         case _:
-            tempstr = '--------------'
-            dcr_row.append(tempstr)
-    dcr_row.append(dcr_bin_str.bin[8:41])
-    return dcr_row
+            tp = f'UNKNOWN "{cols[0]}"'
+    cells = (seen_str(row.last_seen), ' '.join(map(str, sorted(row.sats))), tp, cols[1], cols[2], cols[3], cols[4])
+    if multi_rx:
+        return cells + (row.source,)
+    return cells
+
+row_cells = {'RLM': RowCache(format_rlm_row), 'DCR': RowCache(format_dcr_row)}
+report_cols = RowCache(report_columns)     # decoded once per report version, not per repeat
+
+def mark_dirty(name, key=None):
+    if renderer is None:
+        return
+    if key is not None:
+        row_cells[name].invalidate(key)
+    renderer.mark(name)
+
+def evict():
+    for name, table in (('RLM', tab), ('DCR', dcr_tab)):
+        for key in table.evict():
+            mark_dirty(name, key)
+            if name == 'DCR':
+                report_cols.invalidate(key)
+
+
+def beacon_event(row, event, new):
+    return {'event': 'rlm', 'new': new, 'hexid': event.hexid.upper(), 'svid': row.svid,
+            'type': row.type, 'country': row.country, 'message': event.message,
+            'params': event.params, 'first_seen': row.first_seen, 'last_seen': row.last_seen,
+            'count': row.count, 'source': row.source}
+
+def report_event(row, change):
+    cols = report_cols.get(row.key, row)
+    return {'event': 'dcr', 'new': change == NEW, 'change': change, 'report': row.key, 'svid': row.svid,
+            'priority': cols[0], 'category': cols[1], 'report_time': cols[2], 'info_type': cols[3], 'info': cols[4],
+            'parts': len(row.parts), 'sats': row.sats, 'first_seen': row.first_seen, 'last_seen': row.last_seen,
+            'count': row.count, 'source': row.source}
+
+def feed_summary():
+    lat = feed.latency.summary()
+    line = f'Feed: {feed.published} events, {feed.dropped()} dropped'
+    if lat['count']:
+        line += f', latency p50 {lat["p50_ms"]:.2f} ms, p99 {lat["p99_ms"]:.2f} ms, max {lat["max_ms"]:.2f} ms'
+    print(line)
+
+def rlm_update(event):
+    row = tab.get(event.key)
+    new = row is None
+    if new:
+        row = new_row(event)
+        tab.add(row)
+    else:
+        row.svid = event.svid
+        row.last_seen = int(time.time())
+        row.count += 1
+        row.source = event.source
+        tab.touch(row)
+    if store:
+        store.add_rlm(row.last_seen, event.svid, event.key, row.type, row.country,
+                      event.message, event.params, event.source)
+    if feed:
+        feed.publish(beacon_event(row, event, new), event.arrived)
+    mark_dirty('RLM', event.key)
+
+def dcr_update(event):
+    # repeats of a message only count; it is decoded and logged once
+    now = int(time.time())
+    row = dcr_tab.get(event.key)
+    if row is None:
+        change = NEW
+        row = Report(event.key, event.bits, event.svid, now, event.source)
+        dcr_tab.add(row)
+    else:
+        change = row.merge(event.bits)
+        row.heard(event.svid, now, event.source)
+        dcr_tab.touch(row)
+    if change not in (REPEAT, STALE):
+        report_cols.invalidate(event.key)
+        dcr_log_row(event, now)
+    if store:
+        store.add_dcr(now, event.svid, event.bits, event.source)
+    if feed:
+        feed.publish(report_event(row, change), event.arrived)
+    mark_dirty('DCR', event.key)
+
+def sat_str(svid, quality):
+    if quality in (5, 6, 7):
+        return f'[bold green3]{svid}[/bold green3] '
+    if quality == 4:
+        return f'[bold yellow3]{svid}[/bold yellow3] '
+    return f'[bold grey46]{svid}[/bold grey46] '
+
+def sky_str(gnss):
+    # satellites of the system over all receivers, with the best quality any of them has
+    best = {}
+    for sky in skies.values():
+        for sat in sky.system(gnss):
+            best[sat.svid] = max(sat.quality, best.get(sat.svid, sat.quality))
+    return ''.join(sat_str(svid, quality) for svid, quality in best.items())
+
+def count_locked():
+    # for the metrics gauge, which runs in another thread and only reads the result
+    global locked_sats
+    locked_sats = {('gnss', name): len(set().union(*(sky.locked(gnss) for sky in skies.values())))
+                   for gnss, name in ((2, 'Galileo'), (5, 'QZSS'))}
+
+def navsat_update(event):
+    # only satellites whose quality changed since the last epoch are stored and redrawn
+    global gal_str, qzss_str
+    sky = skies.get(event.source)
+    if sky is None:
+        sky = skies[event.source] = Sky()
+    changes = sky.update(event.svs)
+    if not changes:
+        return
+    if store:
+        now = int(time.time())
+        for gnss_id, svid, quality in changes:
+            sat = sky.sats.get((gnss_id, svid))
+            store.add_sat(now, gnss_id, svid, quality, sat and sat.cno, sat and sat.elev, event.source)
+    if metrics:
+        count_locked()
+    systems = {gnss_id for gnss_id, svid, quality in changes}
+    if 2 in systems:
+        line = sky_str(2)
+        if line != gal_str:
+            gal_str = line
+            mark_dirty('RLM')
+    if 5 in systems:
+        line = sky_str(5)
+        if line != qzss_str:
+            qzss_str = line
+            mark_dirty('DCR')
+
+STAGES = {'RXM-RLM': 'rlm', 'RXM-SFRBX': 'dcr', 'NAV-SAT': 'navsat'}
+
+def process_message(parsed_data, source=None, arrived=None):
+    if metrics:
+        start = time.perf_counter()
+        handled = handle_message(parsed_data, source, arrived)
+        metrics.count('gnss_messages_total', ('identity', parsed_data.identity))
+        if handled:
+            metrics.observe(STAGES[parsed_data.identity], time.perf_counter() - start)
+        return handled
+    return handle_message(parsed_data, source, arrived)
+
+def handle_message(parsed_data, source=None, arrived=None):
+    # True if the message was one of ours and the tables may have changed
+    event = decode_message(parsed_data, source, arrived)
+    if event is None:
+        return False
+    if isinstance(event, RLMEvent):
+        rlm_update(event)
+    elif isinstance(event, DCREvent):
+        dcr_update(event)
+    else:
+        navsat_update(event)
+    return True
+
+def replay_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, '*.ubx')) + glob.glob(os.path.join(path, '*.ubxz')))
+            continue
+        matched = sorted(glob.glob(path))
+        if not matched:
+            from rich import print
+            print(f'[bold red]No capture found: {path}[/bold red]')
+        files += matched
+    return files
+
+def replay_archive(files):
+    # parallel decode, then fill the tables and logs in first-seen order
+    from archive import decode_archive
+    beacons, dcrs, counts = decode_archive(files, args.jobs or None)
+    now = int(time.time())
+    for key, (first, last, count, svid, first_svid, message, params) in beacons.items():
+        hexid = beacon_hexid(key).upper()
+        row = Beacon(key, svid, now, count=count)
+        tab.add(row)
+        rlm_log.write([first_svid, hexid, row.type, row.country, seen_str(now), message, params])
+    # every distinct message in the order it was first heard, as dcr_update() would see them
+    messages = sorted((pos, key, bits, first_row) for key, tally in dcrs.items() for pos, bits, first_row in tally[5].values())
+    for pos, key, bits, first_row in messages:
+        row = dcr_tab.get(key)
+        if row is None:
+            dcr_tab.add(Report(key, bits, 0, now))
+        elif row.merge(bits) == STALE:
+            continue
+        dcr_log.write([seen_str(now)] + first_row)
+    for key, (first, last, count, svid, sats, messages) in dcrs.items():
+        row = dcr_tab.get(key)
+        row.svid = svid
+        row.sats = sats
+        row.count = count
+    evict()
+    return counts
+
+def replay(paths):
+    from ubxframe import UBXFramer
+    from ubxz import UBXZReader, is_ubxz
+    files = replay_files(paths)
+    start = time.perf_counter()
+    archives = {fname for fname in files if is_ubxz(fname)}
+    if (args.since is not None or args.until is not None) and len(archives) < len(files):
+        parser.error(f'--since/--until apply to .ubxz archives only, not to {", ".join(f for f in files if f not in archives)}')
+    # workers split raw .ubx files only; the store, feed and metrics need every message in this process,
+    # --max_rows evicting (and re-adding) rows in message order
+    if args.jobs != 1 and not (store or feed or metrics or archives or args.max_rows is not None):
+        counts = replay_archive(files)
+    else:
+        counts = {}
+        frames = checksum_errors = 0
+        for fname in files:
+            if fname in archives:
+                reader = UBXZReader(fname)
+                stream = reader.stream(args.since, args.until)
+            else:
+                reader = stream = open(fname, 'rb')
+            with reader:
+                framer = UBXFramer(stream, metrics=metrics)
+                for (raw_data, parsed_data) in framer:
+                    counts[parsed_data.identity] = counts.get(parsed_data.identity, 0) + 1
+                    process_message(parsed_data, arrived=framer.arrived)
+                    evict()
+                frames += framer.frames
+                checksum_errors += framer.checksum_errors
+        print(f'UBX frames: {frames}, checksum errors: {checksum_errors}')
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f'Decoded {total} messages in {elapsed:.2f} s ({rate:.0f} msg/s)')
+    for identity, count in sorted(counts.items()):
+        print(f'  {identity}: {count}')
+    print(f'Beacons: {len(tab)}, DC reports: {len(dcr_tab)}')
+    if feed:
+        feed_summary()
+
+def autoconf(port):
+    from serial import Serial
+    from pyubx2 import UBXMessage, SET
+    msg_list = []
+    serialout = Serial(port, 38400, timeout=10)
+    msg_list.append(UBXMessage('CFG','CFG-GNSS', SET, msgVer=0, numTrkChHw=0, numTrkChUse=255, numConfigBlocks=7, gnssId_01=0, resTrkCh_01=4, maxTrkCh_01=4, reserved0_01=0, enable_01=1, sigCfMask_01=1, gnssId_02=1, resTrkCh_02=0, maxTrkCh_02=0, reserved0_02=0, enable_02=0, sigCfMask_02=1, gnssId_03=2, resTrkCh_03=10, maxTrkCh_03=10, reserved0_03=0, enable_03=1, sigCfMask_03=1, gnssId_04=3, resTrkCh_04=0, maxTrkCh_04=0, reserved0_04=0, enable_04=0, sigCfMask_04=1, gnssId_05=4, resTrkCh_05=0, maxTrkCh_05=0, reserved0_05=0, enable_05=0, sigCfMask_05=1, gnssId_06=5, resTrkCh_06=4, maxTrkCh_06=4, reserved0_06=0, enable_06=1, sigCfMask_06=5, gnssId_07=6, resTrkCh_07=0, maxTrkCh_07=0, reserved0_07=0, enable_07=0, sigCfMask_07=1))
+    msg_list.append(UBXMessage('CFG', 'CFG-MSG', SET, msgClass=0x02, msgID=0x59, rateDDC=0, rateUART1=1, rateUART2=0, rateUSB=1, rateSPI=0, reserved=0))
+    msg_list.append(UBXMessage('CFG', 'CFG-MSG', SET, msgClass=0x02, msgID=0x13, rateDDC=0, rateUART1=1, rateUART2=0, rateUSB=1, rateSPI=0, reserved=0))
+    msg_list.append(UBXMessage('CFG', 'CFG-MSG', SET, msgClass=0x01, msgID=0x35, rateDDC=0, rateUART1=1, rateUART2=0, rateUSB=1, rateSPI=0, reserved=0))
+    msg_list.append(UBXMessage('CFG', 'CFG-RATE', SET, measRate=20000, navRate=1, timeRef=1))
+    msg_list.append(UBXMessage('CFG', 'CFG-CFG', SET, clearMask=b'\x00\x00\x00\x00', saveMask=b'\xff\xff\x00\x00', loadMask=b'\x00\x00\x00\x00', devBBR=1, devFlash=1, devEEPROM=1, devSpiFlash=0))
+    msg_list.append(UBXMessage(b'\x06', b'\x04', SET, payload=b'\xff\xff\x02\x00'))
+    for msg in msg_list:
+        out = msg.serialize()
+        serialout.write(out)
+        time.sleep(1)
+        print('set params...')
+    serialout.close()
+
+def warm_tables():
+    # start the live tables from the store; rows that --row_ttl, --max_age or
+    # --max_rows would evict right away are not loaded
+    now = int(time.time())
+    windows = [window for window in (tab.ttl, tab.max_age) if window is not None]
+    since = now - min(windows) if windows else 0
+    first_since = now - tab.max_age if tab.max_age is not None else 0
+    for key, svid, _, _, source, first, last, count in store.beacons(since, first_since, tab.max_rows):
+        row = Beacon(key, svid, first, source if multi_rx else None, count)
+        row.last_seen = last
+        tab.add(row)
+    for key, bits, svid, source, first, last, count in store.reports(since, first_since, dcr_tab.max_rows):
+        row = dcr_tab.get(key)
+        if row is None:
+            row = Report(key, bits, svid, first, source if multi_rx else None, count)
+            dcr_tab.add(row)
+        else:
+            row.merge(bits)
+            row.heard(svid, row.last_seen, source if multi_rx else None, count)
+        row.last_seen = max(row.last_seen, last)
+    for table in (tab, dcr_tab):
+        for row in sorted(table, key=lambda row: row.last_seen):
+            table.touch(row)
+    evict()
 
-def dcr_add_row(row):
-    dcr_tab.append(row)
-    with open(args.out_dcr_file, 'a', newline='') as csvfile:
-        writer_object = csv.writer(csvfile, delimiter=';')
-        writer_object.writerow(row[:-1])    
+def open_tee(source):
+    # one capture per receiver, named after the port when there are several
+    from ingest import RawTee
+    path = args.tee
+    if multi_rx:
+        base, ext = os.path.splitext(path)
+        path = f'{base}-{os.path.basename(source)}{ext}'
+    return RawTee(path, int(args.tee_rotate_mb * 1024 * 1024) if args.tee_rotate_mb else None)
 
+def open_archive(source):
+    from ubxz import UBXZWriter
+    path = args.archive
+    if multi_rx:
+        base, ext = os.path.splitext(path)
+        path = f'{base}-{os.path.basename(source)}{ext}'
+    return UBXZWriter(path, navsat_sec=args.archive_navsat_sec)
 
-def gen_table() -> Table:
+def rlm_table() -> 'Table':
+    from rich.table import Table
+    from rich import box
     title_str = f"[bold blue] \nCOSPAS BEACONS RETURN LINK MESSAGES [/bold blue]\n [link=https://cospas-sarsat.int/en/beacons-pro/beacon-message-decode-program-txsep/beacon-decode-2019][i]Link to HEXID decoder[/i][/link] \n GAL SATS: {gal_str}"
     table = Table(show_header=True, header_style="bold", box=box.ROUNDED, border_style="deep_sky_blue4", title=title_str,title_justify='center')
     table.add_column("SAT", header_style="gold3")
@@ -412,127 +433,154 @@ def gen_table() -> Table:
     table.add_column("COUNTRY", header_style="magenta", justify="center",max_width=20)
     table.add_column("LAST SEEN", header_style="sea_green2", justify="center")
     table.add_column("TOTAL", header_style="grey42", justify="center")
+    if multi_rx:
+        table.add_column("RX", header_style="grey42", justify="center")
+    cells = row_cells['RLM']
     for row in tab :
-        if row[2] in ('ORB', 'TEST', 'RLS/TEST EPIRB', 'RLS/TEST') :
-            hextid = '[bold][steel_blue1]' + str(row[1]) + '[/steel_blue1][/bold]'
-        else:
-            hextid = '[bold][red on white]' + str(row[1]) + '[/red on white][/bold]'
-        table.add_row(str(row[0]), hextid, row[2], row[3], row[4], str(row[5]))
-    dcr_table = Table(show_header=True, header_style="bold", box=box.ROUNDED, show_lines=True,title_justify='center', border_style="deep_sky_blue4", title=f"[bold blue] \nDC REPORTS[/bold blue]\nQZSS SATS: {qzss_str}\n")
-    dcr_table.add_column("RECEIPT TIME", header_style="sea_green2", justify="center")
-    dcr_table.add_column("SAT", header_style="gold3", justify="center")
-    dcr_table.add_column("PRIORITY", header_style="blue", justify="center", min_width=3)
-    dcr_table.add_column("CATEGORY", header_style="magenta", justify="center", min_width=7)
-    dcr_table.add_column("REPORT TIME", header_style="sea_green2", justify="center",min_width=11)
-    dcr_table.add_column("INFO TYPE", header_style="gold3", justify="center")
-    dcr_table.add_column("INFO", header_style="blue", justify="center",min_width=25)
+        table.add_row(*cells.get(row.key, row))
+    return table
+
+def dcr_table() -> 'Table':
+    from rich.table import Table
+    from rich import box
+    table = Table(show_header=True, header_style="bold", box=box.ROUNDED, show_lines=True,title_justify='center', border_style="deep_sky_blue4", title=f"[bold blue] \nDC REPORTS[/bold blue]\nQZSS SATS: {qzss_str}\n")
+    table.add_column("RECEIPT TIME", header_style="sea_green2", justify="center")
+    table.add_column("SAT", header_style="gold3", justify="center")
+    table.add_column("PRIORITY", header_style="blue", justify="center", min_width=3)
+    table.add_column("CATEGORY", header_style="magenta", justify="center", min_width=7)
+    table.add_column("REPORT TIME", header_style="sea_green2", justify="center",min_width=11)
+    table.add_column("INFO TYPE", header_style="gold3", justify="center")
+    table.add_column("INFO", header_style="blue", justify="center",min_width=25)
+    if multi_rx:
+        table.add_column("RX", header_style="grey42", justify="center")
+    cells = row_cells['DCR']
     for row in dcr_tab:
-        match row[2] :
-            case '1' :
-                tp = '[bold][red1]MAX[/red1][/bold]'
-            case '2' :
-                tp = '[bold][gold3]PRIORITY[/gold3][/bold]'
-            case '3' :
-                tp = '[bold][blue]REGULAR[/blue][/bold]'
-            case '7' : 
-                tp = 'TRNG/TEST'
-            case _:
-                tp = f'UNKNOWN "{row[2]}"'
-        dcr_table.add_row(row[0],row[1], tp,row[3],row[4],row[5],row[6])
+        table.add_row(*cells.get(row.key, row))
+    return table
+
+def gen_table() -> 'Layout':
+    from rich.layout import Layout
     layout = Layout()
     layout.split_row(
-    Layout(table,name="RLM"),
-    Layout(dcr_table,name="DCR", minimum_size=120))
-    global reset_time
+    Layout(rlm_table(),name="RLM"),
+    Layout(dcr_table(),name="DCR", minimum_size=120))
     if args.hide_qzss:
         layout["DCR"].visible = False
     if args.hide_rlm:
         layout["RLM"].visible = False
-    if args.autodel:
-        if int(time.time()) - reset_time > 21600: # *           Auto delete period
-           reset_time = int(time.time())
-           tab.clear()
-           dcr_tab.clear()
     return layout
 
 
-if args.autoconf:
-    msg_list = []
-    serialout = Serial(args.serialport, 38400, timeout=10)
-    msg_list.append(UBXMessage('CFG','CFG-GNSS', SET, msgVer=0, numTrkChHw=0, numTrkChUse=255, numConfigBlocks=7, gnssId_01=0, resTrkCh_01=4, maxTrkCh_01=4, reserved0_01=0, enable_01=1, sigCfMask_01=1, gnssId_02=1, resTrkCh_02=0, maxTrkCh_02=0, reserved0_02=0, enable_02=0, sigCfMask_02=1, gnssId_03=2, resTrkCh_03=10, maxTrkCh_03=10, reserved0_03=0, enable_03=1, sigCfMask_03=1, gnssId_04=3, resTrkCh_04=0, maxTrkCh_04=0, reserved0_04=0, enable_04=0, sigCfMask_04=1, gnssId_05=4, resTrkCh_05=0, maxTrkCh_05=0, reserved0_05=0, enable_05=0, sigCfMask_05=1, gnssId_06=5, resTrkCh_06=4, maxTrkCh_06=4, reserved0_06=0, enable_06=1, sigCfMask_06=5, gnssId_07=6, resTrkCh_07=0, maxTrkCh_07=0, reserved0_07=0, enable_07=0, sigCfMask_07=1))
-    msg_list.append(UBXMessage('CFG', 'CFG-MSG', SET, msgClass=0x02, msgID=0x59, rateDDC=0, rateUART1=1, rateUART2=0, rateUSB=1, rateSPI=0, reserved=0))
-    msg_list.append(UBXMessage('CFG', 'CFG-MSG', SET, msgClass=0x02, msgID=0x13, rateDDC=0, rateUART1=1, rateUART2=0, rateUSB=1, rateSPI=0, reserved=0))
-    msg_list.append(UBXMessage('CFG', 'CFG-MSG', SET, msgClass=0x01, msgID=0x35, rateDDC=0, rateUART1=1, rateUART2=0, rateUSB=1, rateSPI=0, reserved=0))
-    msg_list.append(UBXMessage('CFG', 'CFG-RATE', SET, measRate=20000, navRate=1, timeRef=1))
-    msg_list.append(UBXMessage('CFG', 'CFG-CFG', SET, clearMask=b'\x00\x00\x00\x00', saveMask=b'\xff\xff\x00\x00', loadMask=b'\x00\x00\x00\x00', devBBR=1, devFlash=1, devEEPROM=1, devSpiFlash=0))
-    msg_list.append(UBXMessage(b'\x06', b'\x04', SET, payload=b'\xff\xff\x02\x00'))
-    for msg in msg_list:
-        out = msg.serialize()
-        serialout.write(out)
-        time.sleep(1)
-        print('set params...')
-    serialout.close()
+def main(argv=None):
+    global args, metrics, tab, dcr_tab, multi_rx, rlm_log, dcr_log, store, feed
+    args = parser.parse_args(argv)
+    if not args.serialport and not args.replay:
+        parser.error('serialport is required unless --replay is given')
+    if args.fps <= 0:
+        parser.error('--fps must be positive')
+    if args.jobs < 0:
+        parser.error('--jobs must be 0 (all cores) or a positive number of processes')
+    if (args.since is not None or args.until is not None) and not args.replay:
+        parser.error('--since/--until need --replay')
 
-#stream = open('out.ubx', 'rb')
-stream = Serial(args.serialport, 38400, timeout=30)
-
-with Live(gen_table(), auto_refresh=False) as live:
-    ubr = UBXReader(stream, protfilter=2)
-    (raw_data, parsed_data) = ubr.read()
-    for (raw_data, parsed_data) in ubr:
-        if parsed_data.identity == 'RXM-RLM':
-            s = BitArray(uintle=parsed_data.beacon, length=64)
-            s = str(s.hex)
-            s = s[1:]
-            if len(tab) > 0 :
-                new = True
-                for row in tab :
-                    if row.count(s.upper()) > 0 :
-                        now = datetime.now().strftime("%H:%M %d-%m")
-                        row[0] = parsed_data.svId
-                        row[4] = str(now)
-                        row[5] += 1
-                        new = False
-                        break
-                if new : tab.append(new_row(parsed_data,s))
-            else:
-                tab.append(new_row(parsed_data,s))
-            live.update(gen_table(), refresh=True)
-        elif parsed_data.identity == 'RXM-SFRBX' and parsed_data.gnssId == 5 and (str(bin(parsed_data.dwrd_01)).zfill(32)[10:16] in ('101011', '101100')):
-            dcr_bin_str = ""
-            for i in range(8) :
-                temp = BitArray(uint=getattr(parsed_data,f"dwrd_{i+1:02}"), length=32)
-                dcr_bin_str += temp.bin
-            dcr_bin_str = BitArray(bin=dcr_bin_str)
-            if len(dcr_tab) > 0 :
-                new = True
-                row_c = 0
-                for row in dcr_tab:
-                    if dcr_bin_str.bin[8:41] == row[7]:
-                        dcr_tab[row_c] = dcr_parse_row(dcr_bin_str,parsed_data.svId)
-                        new = False
-                        break
-                    row_c += 1                    
-                if new : dcr_add_row(dcr_parse_row(dcr_bin_str,parsed_data.svId))
-            else: dcr_add_row(dcr_parse_row(dcr_bin_str,parsed_data.svId))
-            live.update(gen_table(), refresh=True)
-        elif parsed_data.identity == 'NAV-SAT':
-            size = parsed_data.numSvs
-            gal_str = ''
-            qzss_str = ''
-            for i in range(size):
-                if getattr(parsed_data, f"gnssId_{i+1:02}") == 2:
-                    if getattr(parsed_data, f"qualityInd_{i+1:02}") in(5,6,7):
-                        gal_str += f'[bold green3]{getattr(parsed_data, f"svId_{i+1:02}")}[/bold green3] '
-                    elif getattr(parsed_data, f"qualityInd_{i+1:02}") == 4:
-                        gal_str += f'[bold yellow3]{getattr(parsed_data, f"svId_{i+1:02}")}[/bold yellow3] '                    
-                    else:
-                        gal_str += f'[bold grey46]{getattr(parsed_data, f"svId_{i+1:02}")}[/bold grey46] '
-                elif getattr(parsed_data, f"gnssId_{i+1:02}") == 5:
-                    if getattr(parsed_data, f"qualityInd_{i+1:02}") in(5,6,7):                        
-                        qzss_str += f'[bold green3]{getattr(parsed_data, f"svId_{i+1:02}")}[/bold green3] '
-                    elif getattr(parsed_data, f"qualityInd_{i+1:02}") == 4:
-                        qzss_str += f'[bold yellow3]{getattr(parsed_data, f"svId_{i+1:02}")}[/bold yellow3] '                        
-                    else:
-                        qzss_str += f'[bold grey46]{getattr(parsed_data, f"svId_{i+1:02}")}[/bold grey46] '
-            live.update(gen_table(), refresh=True)         
\ No newline at end of file
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        atexit.register(profiler.dump_stats, args.profile)
+        atexit.register(profiler.disable)     # runs first
+
+    metrics = Metrics() if args.metrics or args.metrics_file else None
+    if args.metrics:
+        serve(metrics, args.metrics)
+    if args.metrics_file:
+        metrics_writer = MetricsWriter(metrics, args.metrics_file, args.metrics_sec)
+        metrics_writer.start()
+        atexit.register(metrics_writer.stop)
+
+    tab = open_table()
+    dcr_tab = open_table()
+    multi_rx = len(args.serialport) > 1
+    rx_column = ['RECEIVER'] if multi_rx else []
+
+    load_countries()
+
+    rlm_log = open_log(args.out_rlm_file, ['SAT', 'BEACON HEXID', 'TYPE', 'COUNTRY', 'SEEN', 'Message', 'Params'] + rx_column)
+    dcr_log = open_log(args.out_dcr_file, ['RECEIPT TIME', 'SAT', 'PRIORITY', 'CATEGORY', 'REPORT TIME', 'INFO TYPE', 'INFO'] + rx_column)
+    if args.db:
+        from store import EventStore
+        store = EventStore(args.db, max_delay=args.log_flush_sec, metrics=metrics)
+    log_flusher = SinkFlusher([rlm_log, dcr_log] + ([store] if store else []))
+    log_flusher.start()
+    atexit.register(log_flusher.stop)   # flushes and closes the logs, also on Ctrl+C
+
+    if args.feed:
+        from feed import EventFeed
+        feed = EventFeed(args.feed, args.feed_queue)
+        feed.start()
+        atexit.register(feed.close)
+
+    if metrics:
+        metrics.gauge('gnss_table_rows', 'Rows in the live tables', lambda: {('table', 'rlm'): len(tab), ('table', 'dcr'): len(dcr_tab)})
+        metrics.gauge('gnss_locked_sats', f'Satellites tracked with qualityInd >= {LOCKED}', lambda: locked_sats)
+        if feed:
+            metrics.gauge('gnss_feed_events', 'Feed events published and dropped',
+                          lambda: {('kind', 'published'): feed.published, ('kind', 'dropped'): feed.dropped()})
+            metrics.gauge('gnss_feed_latency_ms', 'Frame arrival to feed publish latency over the last 1000 events',
+                          lambda: {('stat', k[:-3]): v for k, v in feed.latency.summary().items() if k != 'count'})
+
+    if args.replay:
+        replay(args.replay)
+        return
+
+    if args.autoconf:
+        for port in args.serialport:
+            if not os.path.isfile(port):
+                autoconf(port)
+    if store:
+        warm_tables()
+    run_live()
+
+def run_live():
+    # receivers and the TUI
+    global renderer
+    from rich.live import Live
+    from ingest import Ingest
+    ingest = Ingest(args.serialport, metrics=metrics, ring_size=args.ring_kb * 1024, tee=open_tee if args.tee else None,
+                    archive=open_archive if args.archive else None)
+    ingest.start()
+    atexit.register(ingest.stop)
+    if metrics:
+        metrics.gauge('gnss_ingest_queue', 'Messages waiting between the readers and the decoder', ingest.messages.qsize)
+        ports = [reader for reader in ingest.readers if reader.ring]
+        metrics.gauge('gnss_port_bytes', 'Bytes read from each serial port',
+                      lambda: {('source', r.name): r.ring.written for r in ports})
+        metrics.gauge('gnss_port_overflow_bytes', 'Bytes dropped because the receive buffer was full',
+                      lambda: {('source', r.name): r.ring.overflow for r in ports})
+        metrics.gauge('gnss_port_reconnects', 'Times a serial port failed and was reopened',
+                      lambda: {('source', r.name): r.reconnects for r in ports})
+
+    layout = gen_table()
+    with Live(layout, auto_refresh=False) as live:
+        renderer = RenderScheduler(live, layout, {'RLM': rlm_table, 'DCR': dcr_table}, args.fps, metrics)
+        renderer.start()
+        try:
+            for (source, parsed_data, info) in ingest:
+                if parsed_data is None and info is not None:     # a port failed, it is being reopened
+                    live.console.print(f'[bold yellow]{source} disconnected: {info}, reconnecting[/bold yellow]')
+                    continue
+                if parsed_data is None:
+                    err = ingest.reader(source).error
+                    live.console.print(f'[bold red]{source} stopped{f": {err}" if err else ""}[/bold red]')
+                    continue
+                with renderer.lock:
+                    process_message(parsed_data, source if multi_rx else None, info)
+                    evict()
+        finally:
+            renderer.stop()
+            if feed:
+                feed_summary()
+
+
+if __name__ == '__main__':
+    main()
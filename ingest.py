@@ -0,0 +1,201 @@
+# Concurrent ingestion from several receivers.
+# Every source (serial port or .ubx capture file) gets its own reader thread
+# that parses UBX and feeds (receiver name, message, arrival time) into one shared queue, so
+# a slow or disconnected port never holds up the others.
+# A serial port is drained by a separate pump thread into a bounded ring
+# buffer, so parsing or a busy decoder can't overflow the OS buffer; when the
+# ring is full the new bytes are dropped and counted and the framer resyncs at
+# the next sync word. A port that fails is reopened with exponential backoff,
+# and everything read can be teed to a size-rotated .ubx capture and/or its
+# decodable frames kept in a compressed, time-indexed .ubxz archive.
+import os
+import queue
+import threading
+import time
+from serial import Serial, SerialException
+from logsink import rotated_name
+from ubxframe import UBXFramer
+
+RING_SIZE = 1 << 20
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 30.0
+
+
+class RingBuffer:
+    # single producer (pump) / single consumer (framer) byte FIFO; the pump
+    # reads the port straight into the free part of the buffer
+    def __init__(self, size=RING_SIZE):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.size = size
+        self.head = 0           # next byte to read
+        self.count = 0          # bytes buffered
+        self.written = 0        # bytes taken from the port
+        self.overflow = 0       # bytes dropped because the buffer was full
+        self.arrived = None     # time.monotonic() of the last fill
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def fill(self, port, scratch):
+        # one port read; returns a view of the bytes read, which stays valid
+        # until the next fill (into scratch if they had to be dropped)
+        with self.cond:
+            tail = (self.head + self.count) % self.size
+            free = min(self.size - self.count, self.size - tail)
+        want = max(1, port.in_waiting)
+        if not free:
+            n = port.readinto(scratch[:min(want, len(scratch))])
+            with self.cond:
+                self.overflow += n
+            return scratch[:n]
+        n = port.readinto(self.view[tail:tail + min(want, free)])
+        if n:
+            with self.cond:
+                self.count += n
+                self.written += n
+                self.arrived = time.monotonic()
+                self.cond.notify()
+        return self.view[tail:tail + n]
+
+    def read(self, size=-1):
+        # waits for data, returns b'' only once closed and drained
+        with self.cond:
+            while not self.count and not self.closed:
+                self.cond.wait()
+            n = self.count if size < 0 else min(size, self.count)
+            first = min(n, self.size - self.head)
+            data = bytes(self.view[self.head:self.head + first]) + bytes(self.view[:n - first])
+            self.head = (self.head + n) % self.size
+            self.count -= n
+            return data
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+
+class RawTee:
+    # append-only copy of the raw port bytes, rotated by size like the CSV logs
+    def __init__(self, path, rotate_bytes=None):
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.lock = threading.Lock()
+        self.file = open(path, 'ab')
+
+    def write(self, data):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(data)
+            if self.rotate_bytes and self.file.tell() >= self.rotate_bytes:
+                self.file.close()
+                os.replace(self.path, rotated_name(self.path, time.strftime('%Y-%m-%dT%H%M%S')))
+                self.file = open(self.path, 'ab')
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class SourceReader:
+    def __init__(self, source, messages, baudrate=38400, metrics=None, ring_size=RING_SIZE, tee=None, archive=None):
+        self.source = source
+        self.metrics = metrics
+        self.name = source
+        self.messages = messages
+        self.baudrate = baudrate
+        self.is_file = os.path.isfile(source)
+        self.error = None
+        self.framer = None
+        self.ring = None if self.is_file else RingBuffer(ring_size)
+        self.tee = tee
+        self.archive = archive      # ubxz.UBXZWriter
+        self.reconnects = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f'reader-{self.name}', daemon=True)
+        self.pump_thread = threading.Thread(target=self.pump, name=f'pump-{self.name}', daemon=True)
+
+    def pump(self):
+        # port -> ring buffer (and tee), reopening the port after errors
+        delay = RECONNECT_MIN
+        scratch = memoryview(bytearray(4096))
+        while not self.stopped.is_set():
+            try:
+                with Serial(self.source, self.baudrate, timeout=1) as port:
+                    delay = RECONNECT_MIN
+                    while not self.stopped.is_set():
+                        data = self.ring.fill(port, scratch)
+                        if data and self.tee:
+                            self.tee.write(data)
+            except (OSError, SerialException) as err:
+                self.error = err
+                self.reconnects += 1
+                try:    # notice only, the source is still active
+                    self.messages.put_nowait((self.name, None, err))
+                except queue.Full:
+                    pass
+                self.stopped.wait(delay)
+                delay = min(delay * 2, RECONNECT_MAX)
+
+    def run(self):
+        if self.is_file:
+            try:
+                with open(self.source, 'rb') as stream:
+                    self.framer = UBXFramer(stream, metrics=self.metrics)
+                    for (raw_data, parsed_data) in self.framer:
+                        self.messages.put((self.name, parsed_data, self.framer.arrived))
+            except OSError as err:
+                self.error = err
+            finally:
+                self.messages.put((self.name, None, None))
+            return
+        self.pump_thread.start()
+        self.framer = UBXFramer(self.ring, metrics=self.metrics)
+        for (raw_data, parsed_data) in self.framer:
+            if self.archive:
+                self.archive.write(raw_data, time.time())
+            self.messages.put((self.name, parsed_data, self.framer.arrived))
+        self.messages.put((self.name, None, None))
+
+    def stop(self):
+        self.stopped.set()
+        if self.ring:
+            self.ring.close()
+
+
+class Ingest:
+    def __init__(self, sources, maxsize=10000, baudrate=38400, metrics=None, ring_size=RING_SIZE, tee=None, archive=None):
+        # tee, archive: function source -> RawTee / UBXZWriter or None, called for serial ports only
+        self.messages = queue.Queue(maxsize)
+        self.readers = [SourceReader(source, self.messages, baudrate, metrics, ring_size,
+                                     tee(source) if tee and not os.path.isfile(source) else None,
+                                     archive(source) if archive and not os.path.isfile(source) else None)
+                        for source in sources]
+
+    def start(self):
+        for reader in self.readers:
+            reader.thread.start()
+
+    def stop(self):
+        for reader in self.readers:
+            reader.stop()
+            if reader.tee:
+                reader.tee.close()
+            if reader.archive:
+                reader.archive.close()
+
+    def reader(self, name):
+        for reader in self.readers:
+            if reader.name == name:
+                return reader
+
+    def __iter__(self):
+        # yields (name, message, arrival time); (name, None, error) when a port
+        # failed and is being reopened, (name, None, None) once a source has ended
+        active = len(self.readers)
+        while active:
+            item = self.messages.get()
+            if item[1] is None and item[2] is None:
+                active -= 1
+            yield item
@@ -0,0 +1,125 @@
+# Buffered CSV log writers.
+# A CsvSink keeps its file open, collects rows in memory and writes them out
+# when `max_rows` are pending or `max_delay` seconds have passed, optionally
+# fsyncing at most every `fsync_every` seconds. Files can be rotated by size
+# or by date; the rotated file keeps its name with a date/time suffix and a
+# fresh file with the header is started.
+import csv
+import os
+import threading
+import time
+from datetime import datetime
+
+
+def timestamp(text):
+    # ISO date/time (command line) -> epoch seconds
+    return datetime.fromisoformat(text).timestamp()
+
+def rotated_name(path, stamp):
+    base, ext = os.path.splitext(path)
+    name = f'{base}-{stamp}{ext}'
+    n = 1
+    while os.path.exists(name):
+        name = f'{base}-{stamp}.{n}{ext}'
+        n += 1
+    return name
+
+
+class CsvSink:
+    def __init__(self, path, header, max_rows=100, max_delay=2.0, fsync_every=None, rotate_bytes=None, rotate_daily=False,
+                 metrics=None):
+        self.path = path
+        self.metrics = metrics
+        self.header = header
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.fsync_every = fsync_every
+        self.rotate_bytes = rotate_bytes
+        self.rotate_daily = rotate_daily
+        self.rows = []
+        self.lock = threading.Lock()
+        self.file = None
+        self.writer = None
+        self.opened_day = None
+        self.last_flush = time.monotonic()
+        self.last_sync = time.monotonic()
+        self.open()
+
+    def open(self):
+        self.file = open(self.path, 'a', newline='')
+        self.writer = csv.writer(self.file, delimiter=';')
+        if self.file.tell() == 0:
+            self.writer.writerow(self.header)
+        self.opened_day = datetime.now().date()
+
+    def rotate(self, stamp):
+        self.file.close()
+        os.replace(self.path, rotated_name(self.path, stamp))
+        self.open()
+
+    def check_rotation(self):
+        if self.rotate_daily and datetime.now().date() != self.opened_day:
+            self.rotate(self.opened_day.isoformat())
+        elif self.rotate_bytes and self.file.tell() >= self.rotate_bytes:
+            self.rotate(datetime.now().strftime('%Y-%m-%dT%H%M%S'))
+
+    def write(self, row):
+        with self.lock:
+            self.rows.append(row)
+            if len(self.rows) >= self.max_rows or time.monotonic() - self.last_flush >= self.max_delay:
+                self._flush()
+
+    def _flush(self, sync=False):
+        start = time.perf_counter()
+        if self.rows:
+            self.check_rotation()
+            self.writer.writerows(self.rows)
+            self.rows = []
+        self.file.flush()
+        if self.metrics:
+            self.metrics.observe('csv_write', time.perf_counter() - start)
+        now = time.monotonic()
+        self.last_flush = now
+        if sync or (self.fsync_every is not None and now - self.last_sync >= self.fsync_every):
+            os.fsync(self.file.fileno())
+            self.last_sync = now
+
+    def flush(self, sync=False):
+        with self.lock:
+            self._flush(sync)
+
+    def poll(self):
+        # time threshold for rows that arrived during a quiet period
+        with self.lock:
+            if self.rows and time.monotonic() - self.last_flush >= self.max_delay:
+                self._flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is None:
+                return
+            self._flush(sync=True)
+            self.file.close()
+            self.file = None
+
+
+class SinkFlusher:
+    def __init__(self, sinks, interval=1.0):
+        self.sinks = sinks
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            for sink in self.sinks:
+                sink.poll()
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        for sink in self.sinks:
+            sink.close()
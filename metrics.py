@@ -0,0 +1,146 @@
+# Pipeline instrumentation in the Prometheus text format.
+# Stages (serial read, UBX parse, message handling, CSV/db writes, rendering)
+# go to per-stage latency histograms, events to labelled counters, and gauges
+# are read from callables when the metrics are collected. Everything is off
+# unless --metrics or --metrics_file is given; the hot paths only test
+# `if metrics:` against None.
+import os
+import threading
+from bisect import bisect_left
+
+# upper bounds in seconds
+BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# name -> help text
+COUNTERS = {'gnss_messages_total': 'Decoded messages by identity',
+            'gnss_frames_total': 'Valid UBX frames by class/ID, also the ones skipped unparsed',
+            'gnss_frames_ignored_total': 'Valid UBX frames skipped by the pre-filter',
+            'gnss_checksum_errors_total': 'UBX frames with a bad checksum',
+            'gnss_parse_errors_total': 'UBX frames pyubx2 could not parse',
+            'gnss_skipped_bytes_total': 'Bytes outside valid UBX frames'}
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)     # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Metrics:
+    def __init__(self):
+        self.stages = {}        # stage -> Histogram
+        self.counters = {}      # (name, label) -> value; label is None or a (key, value) pair
+        self.gauges = []        # (name, help, fn); fn() -> value or {label: value}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, label=None, n=1):
+        key = (name, label)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def gauge(self, name, help, fn):
+        self.gauges.append((name, help, fn))
+
+    def render(self):
+        lines = ['# HELP gnss_stage_seconds Time spent per pipeline stage',
+                 '# TYPE gnss_stage_seconds histogram']
+        with self.lock:
+            for stage, h in sorted(self.stages.items()):
+                total = 0
+                for bound, n in zip(self.buckets_of(h), h.counts):
+                    total += n
+                    lines.append(f'gnss_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {total}')
+                lines.append(f'gnss_stage_seconds_sum{{stage="{stage}"}} {h.sum:.9f}')
+                lines.append(f'gnss_stage_seconds_count{{stage="{stage}"}} {h.count}')
+            counters = sorted(self.counters.items(), key=lambda item: (item[0][0], str(item[0][1])))
+        names = {name for (name, label), value in counters}
+        for name in sorted(names):
+            lines.append(f'# HELP {name} {COUNTERS.get(name, name)}')
+            lines.append(f'# TYPE {name} counter')
+            for (counter, label), value in counters:
+                if counter == name:
+                    lines.append(sample(name, label, value))
+        for name, help, fn in self.gauges:
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} gauge')
+            value = fn()
+            if isinstance(value, dict):
+                lines += [sample(name, label, v) for label, v in value.items()]
+            else:
+                lines.append(sample(name, None, value))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def buckets_of(histogram):
+        return [str(bound) for bound in histogram.buckets] + ['+Inf']
+
+
+def sample(name, label, value):
+    if label is None:
+        return f'{name} {value}'
+    return f'{name}{{{label[0]}="{label[1]}"}} {value}'
+
+
+def serve(metrics, address):
+    # plain HTTP on host:port, any path returns the metrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    host, sep, port = address.rpartition(':')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+class MetricsWriter:
+    # rewrites `path` every `interval` seconds and once more on stop()
+    def __init__(self, metrics, path, interval=10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='metrics-file', daemon=True)
+
+    def write(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.metrics.render())
+        os.replace(tmp, self.path)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.write()
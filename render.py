@@ -0,0 +1,60 @@
+# Throttled TUI rendering.
+# The decoder only marks tables (and rows) dirty; a background thread redraws
+# at most `fps` times per second and rebuilds only the tables that changed
+# since the last frame. Formatted row cells are cached per row key.
+import threading
+import time
+
+
+class RowCache:
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.cells = {}
+
+    def get(self, key, row):
+        cells = self.cells.get(key)
+        if cells is None:
+            cells = self.cells[key] = self.fmt(row)
+        return cells
+
+    def invalidate(self, key):
+        self.cells.pop(key, None)
+
+
+class RenderScheduler:
+    def __init__(self, live, layout, builders, fps, metrics=None):
+        self.live = live
+        self.metrics = metrics
+        self.layout = layout
+        self.builders = builders    # layout name -> function building its renderable
+        self.interval = 1 / fps
+        self.lock = threading.Lock()    # held by the decoder while it changes the tables
+        self.dirty = set()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def mark(self, name):
+        self.dirty.add(name)
+
+    def render(self):
+        start = time.perf_counter()
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            for name in dirty:
+                self.layout[name].update(self.builders[name]())
+        if dirty:
+            self.live.refresh()
+            if self.metrics:
+                self.metrics.observe('render', time.perf_counter() - start)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.render()
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.render()
@@ -0,0 +1,86 @@
+# Satellite status from NAV-SAT.
+# One SatState per (gnssId, svId) is updated in place every epoch; update()
+# diffs the epoch against the previous one and returns only the quality
+# transitions (a satellite coming into view, changing qualityInd or leaving),
+# so the callers redraw and record only when something changed. Transitions
+# are also kept per satellite as a time series, quality_at() and locked() then
+# tell which satellites were tracked when an RLM or a DC Report came in.
+import time
+from bisect import bisect_right
+
+GNSS_NAMES = {0: 'GPS', 1: 'SBAS', 2: 'Galileo', 3: 'BeiDou', 4: 'IMES', 5: 'QZSS', 6: 'GLONASS'}
+LOCKED = 4          # qualityInd 4..7: code locked and time synchronized
+HISTORY = 1000      # transitions kept per satellite
+
+
+class SatState:
+    __slots__ = ('gnss', 'svid', 'quality', 'cno', 'elev', 'seen')
+
+    def __init__(self, gnss, svid, quality, cno, elev, seen):
+        self.gnss = gnss
+        self.svid = svid
+        self.quality = quality
+        self.cno = cno
+        self.elev = elev
+        self.seen = seen
+
+
+class Sky:
+    def __init__(self, history=HISTORY):
+        self.sats = {}          # (gnssId, svId) -> SatState, in order of appearance
+        self.history = {}       # (gnssId, svId) -> ([time], [quality or None when out of view])
+        self.max_history = history
+        self.epochs = 0
+
+    def update(self, svs, now=None):
+        # svs: (gnssId, svId, qualityInd, cno, elev) of one NAV-SAT epoch
+        # -> [(gnssId, svId, quality or None)] for the satellites that changed
+        now = time.time() if now is None else now
+        self.epochs += 1
+        changes = []
+        seen = set()
+        for gnss, svid, quality, cno, elev in svs:
+            key = (gnss, svid)
+            seen.add(key)
+            sat = self.sats.get(key)
+            if sat is None:
+                self.sats[key] = SatState(gnss, svid, quality, cno, elev, now)
+            else:
+                sat.cno = cno
+                sat.elev = elev
+                sat.seen = now
+                if sat.quality == quality:
+                    continue
+                sat.quality = quality
+            changes.append((gnss, svid, quality))
+        if len(seen) != len(self.sats):
+            for key in [key for key in self.sats if key not in seen]:
+                del self.sats[key]
+                changes.append((*key, None))
+        for gnss, svid, quality in changes:
+            self.record((gnss, svid), now, quality)
+        return changes
+
+    def record(self, key, now, quality):
+        times, qualities = self.history.setdefault(key, ([], []))
+        times.append(now)
+        qualities.append(quality)
+        if len(times) > 2 * self.max_history:
+            del times[:-self.max_history]
+            del qualities[:-self.max_history]
+
+    def system(self, gnss):
+        return [sat for sat in self.sats.values() if sat.gnss == gnss]
+
+    def quality_at(self, gnss, svid, t):
+        # qualityInd of the satellite at time t, None if it was not in view (or unknown)
+        times, qualities = self.history.get((gnss, svid), ((), ()))
+        i = bisect_right(times, t)
+        return qualities[i - 1] if i else None
+
+    def locked(self, gnss, t=None):
+        # svIds of the system with qualityInd >= LOCKED at time t (default now)
+        if t is None:
+            return {sat.svid for sat in self.sats.values() if sat.gnss == gnss and sat.quality >= LOCKED}
+        return {svid for (g, svid) in self.history
+                if g == gnss and (self.quality_at(g, svid, t) or 0) >= LOCKED}
@@ -0,0 +1,307 @@
+# Optional SQLite event store.
+# Every RLM is kept as one row; a DC Report is kept once per distinct payload
+# (the message without the rotating preamble and the CRC, dcr_payload), with
+# the bits of its first copy, first/last receipt time and receipt count, and
+# the region codes it
+# names go to a separate index table. Satellite quality is kept as a series of
+# NAV-SAT transitions (in view with a new qualityInd, or out of view as NULL),
+# so reception can be matched against which satellites were locked. Rows are
+# buffered and written in one transaction per batch, the database runs in WAL
+# mode so queries don't block the writer.
+#   python store.py events.db rlm --hexid 8DED3C991EB79FA --since 2026-09-01
+#   python store.py events.db dcr --category Tsunami --region 101
+#   python store.py events.db --svid 27 sat --gnss Galileo
+import argparse
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from beacon_decode import beacon_hexid, hexid_beacon
+from dcr_decode import dcr_id, dcr_msg_types, dcr_payload, dcr_regions, decode_dcr, format_dcr
+from logsink import timestamp
+from sky import GNSS_NAMES
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS rlm (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    svid INTEGER,
+    hexid TEXT NOT NULL,
+    type TEXT,
+    country TEXT,
+    message INTEGER,
+    params TEXT,
+    source TEXT);
+CREATE INDEX IF NOT EXISTS rlm_hexid ON rlm (hexid, ts);
+CREATE INDEX IF NOT EXISTS rlm_svid ON rlm (svid, ts);
+CREATE INDEX IF NOT EXISTS rlm_ts ON rlm (ts);
+CREATE TABLE IF NOT EXISTS dcr (
+    id INTEGER PRIMARY KEY,
+    payload BLOB NOT NULL UNIQUE,
+    bits BLOB NOT NULL,
+    report INTEGER NOT NULL,
+    msg_type INTEGER,
+    priority INTEGER,
+    category INTEGER,
+    info_type INTEGER,
+    svid INTEGER,
+    first_seen INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    source TEXT);
+CREATE INDEX IF NOT EXISTS dcr_category ON dcr (category, first_seen);
+CREATE INDEX IF NOT EXISTS dcr_first_seen ON dcr (first_seen);
+CREATE INDEX IF NOT EXISTS dcr_last_seen ON dcr (last_seen);
+CREATE INDEX IF NOT EXISTS dcr_svid ON dcr (svid, first_seen);
+CREATE INDEX IF NOT EXISTS dcr_report ON dcr (report, first_seen);
+CREATE TABLE IF NOT EXISTS dcr_region (
+    code INTEGER NOT NULL,
+    dcr INTEGER NOT NULL,
+    PRIMARY KEY (code, dcr)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sat (
+    ts INTEGER NOT NULL,
+    gnss INTEGER NOT NULL,
+    svid INTEGER NOT NULL,
+    quality INTEGER,
+    cno INTEGER,
+    elev INTEGER,
+    source TEXT);
+CREATE INDEX IF NOT EXISTS sat_svid ON sat (gnss, svid, ts);
+CREATE INDEX IF NOT EXISTS sat_ts ON sat (ts);
+'''
+
+RLM_INSERT = ('INSERT INTO rlm (ts, svid, hexid, type, country, message, params, source) '
+              'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+DCR_SEEN = 'UPDATE dcr SET svid = ?, last_seen = ?, count = count + 1, source = ? WHERE payload = ?'
+DCR_INSERT = ('INSERT INTO dcr (payload, bits, report, msg_type, priority, category, info_type, svid, first_seen, last_seen, count, source) '
+              'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)')
+SAT_INSERT = 'INSERT INTO sat (ts, gnss, svid, quality, cno, elev, source) VALUES (?, ?, ?, ?, ?, ?, ?)'
+
+# live table warm start: last svId/source and first/last time per beacon or report
+# seen since the first parameter, none with a row before the second (first seen
+# too long ago), at most the third (-1: all) most recently seen
+WARM_BEACONS = '''
+SELECT r.hexid, r.svid, r.type, r.country, r.source, g.first, g.last, g.n
+FROM (SELECT hexid, MIN(ts) AS first, MAX(ts) AS last, MAX(id) AS last_id, COUNT(*) AS n
+      FROM rlm AS w WHERE ts >= ? GROUP BY hexid
+      HAVING NOT EXISTS (SELECT 1 FROM rlm AS o WHERE o.hexid = w.hexid AND o.ts < ?)
+      ORDER BY last DESC LIMIT ?) AS g
+JOIN rlm AS r ON r.id = g.last_id
+ORDER BY g.first'''
+WARM_REPORTS = '''
+SELECT report, bits, svid, source, first_seen, last_seen, count
+FROM dcr WHERE last_seen >= ?1 AND report IN (
+    SELECT report FROM dcr AS w WHERE last_seen >= ?1 GROUP BY report
+    HAVING NOT EXISTS (SELECT 1 FROM dcr AS o WHERE o.report = w.report AND o.first_seen < ?2)
+    ORDER BY MAX(last_seen) DESC LIMIT ?3)
+ORDER BY first_seen, id'''
+
+
+def to_blob(bits):
+    return bits.to_bytes(32, 'big')
+
+def from_blob(blob):
+    return int.from_bytes(blob, 'big')
+
+def payload_blob(bits):
+    return dcr_payload(bits).to_bytes(28, 'big')
+
+
+class EventStore:
+    # same write/poll/close interface as CsvSink, so a SinkFlusher can drive it
+    def __init__(self, path, max_rows=1000, max_delay=2.0, metrics=None):
+        self.path = path
+        self.metrics = metrics
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.rlm = []
+        self.dcr = []
+        self.sat = []
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self.last_flush = time.monotonic()
+
+    def add_rlm(self, ts, svid, beacon, type, country, message, params, source=None):
+        # params: bit string as in the CSV log (up to 96 bits)
+        self.write(self.rlm, (ts, svid, beacon_hexid(beacon).upper(), type, country, message, params, source))
+
+    def add_dcr(self, ts, svid, bits, source=None):
+        self.write(self.dcr, (ts, svid, bits, source))
+
+    def add_sat(self, ts, gnss, svid, quality, cno=None, elev=None, source=None):
+        # quality None: the satellite left the view
+        self.write(self.sat, (ts, gnss, svid, quality, cno, elev, source))
+
+    def write(self, pending, event):
+        with self.lock:
+            pending.append(event)
+            if len(self.rlm) + len(self.dcr) + len(self.sat) >= self.max_rows or time.monotonic() - self.last_flush >= self.max_delay:
+                self._flush()
+
+    def _flush(self):
+        if self.rlm or self.dcr or self.sat:
+            start = time.perf_counter()
+            with self.db:
+                self.db.executemany(RLM_INSERT, self.rlm)
+                self.db.executemany(SAT_INSERT, self.sat)
+                for ts, svid, bits, source in self.dcr:
+                    payload = payload_blob(bits)
+                    if self.db.execute(DCR_SEEN, (svid, ts, source, payload)).rowcount:
+                        continue
+                    r = decode_dcr(bits)
+                    row_id = self.db.execute(DCR_INSERT, (payload, to_blob(bits), dcr_id(bits), r['msg_type'], r['priority'], r.get('category'),
+                                                          r.get('info_type'), svid, ts, ts, source)).lastrowid
+                    self.db.executemany('INSERT OR IGNORE INTO dcr_region (code, dcr) VALUES (?, ?)',
+                                        ((code, row_id) for code in dcr_regions(r)))
+            self.rlm = []
+            self.dcr = []
+            self.sat = []
+            if self.metrics:
+                self.metrics.observe('db_write', time.perf_counter() - start)
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def poll(self):
+        with self.lock:
+            if (self.rlm or self.dcr or self.sat) and time.monotonic() - self.last_flush >= self.max_delay:
+                self._flush()
+
+    def close(self):
+        with self.lock:
+            if self.db is None:
+                return
+            self._flush()
+            self.db.close()
+            self.db = None
+
+    def beacons(self, since=0, first_since=0, limit=None):
+        # -> (beacon, last svId, type, country, last source, first seen, last seen, count), first-seen order,
+        # of the (at most limit most recent) beacons seen since since and first seen since first_since
+        params = (since, first_since, -1 if limit is None else limit)
+        with self.lock:
+            return [(hexid_beacon(hexid), svid, type, country, source, first, last, n)
+                    for hexid, svid, type, country, source, first, last, n in self.db.execute(WARM_BEACONS, params)]
+
+    def reports(self, since=0, first_since=0, limit=None):
+        # -> (report id, bits, svId, source, first seen, last seen, count) of every
+        # distinct message, first-seen order, of reports selected as by beacons()
+        params = (since, first_since, -1 if limit is None else limit)
+        with self.lock:
+            return [(report, from_blob(bits), svid, source, first, last, n)
+                    for report, bits, svid, source, first, last, n in self.db.execute(WARM_REPORTS, params)]
+
+
+def query_rlm(db, hexid=None, svid=None, since=None, until=None, limit=None):
+    where, params = time_range('ts', since, until)
+    if hexid is not None:
+        where.append('hexid = ?')
+        params.append(hexid.upper())
+    if svid is not None:
+        where.append('svid = ?')
+        params.append(svid)
+    sql = 'SELECT ts, svid, hexid, type, country, message, params, source FROM rlm'
+    return db.execute(select(sql, where, 'ts', limit), params)
+
+def query_dcr(db, category=None, region=None, svid=None, since=None, until=None, limit=None):
+    where, params = time_range('first_seen', since, until)
+    if category is not None:
+        where.append('category = ?')
+        params.append(category)
+    if region is not None:
+        where.append('id IN (SELECT dcr FROM dcr_region WHERE code = ?)')
+        params.append(region)
+    if svid is not None:
+        where.append('svid = ?')
+        params.append(svid)
+    sql = 'SELECT first_seen, last_seen, count, svid, bits, source FROM dcr'
+    return db.execute(select(sql, where, 'first_seen', limit), params)
+
+def query_sat(db, gnss=None, svid=None, since=None, until=None, limit=None):
+    where, params = time_range('ts', since, until)
+    if gnss is not None:
+        where.append('gnss = ?')
+        params.append(gnss)
+    if svid is not None:
+        where.append('svid = ?')
+        params.append(svid)
+    sql = 'SELECT ts, gnss, svid, quality, cno, elev, source FROM sat'
+    return db.execute(select(sql, where, 'ts, rowid', limit), params)
+
+def time_range(column, since, until):
+    where, params = [], []
+    if since is not None:
+        where.append(f'{column} >= ?')
+        params.append(since)
+    if until is not None:
+        where.append(f'{column} < ?')
+        params.append(until)
+    return where, params
+
+def select(sql, where, order, limit):
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY {order}'
+    if limit is not None:
+        sql += f' LIMIT {int(limit)}'
+    return sql
+
+
+def category_code(text):
+    if text.isdigit():
+        return int(text)
+    for code, name in dcr_msg_types.items():
+        if name.lower() == text.lower():
+            return code
+    raise argparse.ArgumentTypeError(f'unknown DCR category: {text}')
+
+def gnss_code(text):
+    if text.isdigit():
+        return int(text)
+    for code, name in GNSS_NAMES.items():
+        if name.lower() == text.lower():
+            return code
+    raise argparse.ArgumentTypeError(f'unknown GNSS: {text}')
+
+def ts_str(t):
+    return datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Query the RLM/DCR event store')
+    parser.add_argument('db', help='database written with --db')
+    parser.add_argument('--since', type=timestamp, help='ISO date/time, e.g. 2026-09-01 or 2026-09-01T12:00')
+    parser.add_argument('--until', type=timestamp, help='ISO date/time (exclusive)')
+    parser.add_argument('--svid', type=int, help='satellite')
+    parser.add_argument('--limit', type=int, help='print at most this many rows')
+    kinds = parser.add_subparsers(dest='kind', required=True)
+    rlm = kinds.add_parser('rlm', help='Return Link Messages')
+    rlm.add_argument('--hexid', help='beacon HEXID')
+    dcr = kinds.add_parser('dcr', help='DC Reports')
+    dcr.add_argument('--category', type=category_code, help='category number or name, e.g. 5 or Tsunami')
+    dcr.add_argument('--region', type=int, help='region/prefecture/local government code')
+    sat = kinds.add_parser('sat', help='satellite quality changes from NAV-SAT')
+    sat.add_argument('--gnss', type=gnss_code, help='GNSS number or name, e.g. 2 or Galileo')
+    args = parser.parse_args()
+
+    db = sqlite3.connect(f'file:{args.db}?mode=ro', uri=True)
+    if args.kind == 'rlm':
+        print('SEEN;SAT;BEACON HEXID;TYPE;COUNTRY;Message;Params;RECEIVER')
+        for ts, svid, hexid, type, country, message, params, source in query_rlm(db, args.hexid, args.svid, args.since, args.until, args.limit):
+            print(';'.join((ts_str(ts), str(svid), hexid, type, country, format(message, '04b'), params, source or '')))
+    elif args.kind == 'sat':
+        print('TIME;GNSS;SAT;QUALITY;CNO;ELEV;RECEIVER')
+        for ts, gnss, svid, quality, cno, elev, source in query_sat(db, args.gnss, args.svid, args.since, args.until, args.limit):
+            print(';'.join((ts_str(ts), GNSS_NAMES.get(gnss, str(gnss)), str(svid),
+                            'out of view' if quality is None else str(quality), '' if cno is None else str(cno),
+                            '' if elev is None else str(elev), source or '')))
+    else:
+        print('FIRST SEEN;LAST SEEN;COUNT;SAT;PRIORITY;CATEGORY;REPORT TIME;INFO TYPE;INFO;RECEIVER')
+        for first, last, count, svid, bits, source in query_dcr(db, args.category, args.region, args.svid, args.since, args.until, args.limit):
+            cols = format_dcr(decode_dcr(from_blob(bits)))
+            print(';'.join([ts_str(first), ts_str(last), str(count), str(svid)] + [c.replace('\n', ' ') for c in cols] + [source or '']))
@@ -0,0 +1,154 @@
+# In-memory RLM/DCR tables.
+# Records are __slots__ objects with integer keys and integer (epoch second)
+# timestamps; a beacon's type and country are taken from the bits of its key
+# when asked for and a DC Report keeps only its 256-bit messages, the text is
+# formatted on display. A table is one dict in first-seen order for display
+# (replacing a record keeps its place); when max_rows or ttl is set the dict is
+# kept in last-seen order instead and the first-seen order is a deque of the
+# records, removed ones skipped and dropped from it lazily:
+#   max_rows - keep at most this many, least recently seen go first
+#   max_age  - drop records first seen more than max_age seconds ago
+#   ttl      - drop records not seen for ttl seconds
+import time
+from collections import deque
+from beacon_decode import TYPE_TABLE, beacon_value, country_code, country_name, type_key
+from dcr_decode import dcr_info_type, dcr_payload
+
+# what a received DC Report message did to its report, see Report.merge()
+NEW, REPEAT, PART, UPDATE, STALE = 'new', 'repeat', 'part', 'update', 'stale'
+
+
+class Beacon:
+    __slots__ = ('key', 'svid', 'first_seen', 'last_seen', 'count', 'source')
+
+    def __init__(self, key, svid, seen, source=None, count=1):
+        self.key = key          # RXM-RLM beacon field
+        self.svid = svid
+        self.first_seen = seen
+        self.last_seen = seen
+        self.count = count
+        self.source = source
+
+    @property
+    def type(self):
+        return TYPE_TABLE[type_key(beacon_value(self.key))]
+
+    @property
+    def country(self):
+        return country_name(country_code(beacon_value(self.key)))
+
+
+class Report:
+    # one report as broadcast by every QZSS satellite; a report too long for
+    # one message has several parts, all with the same header
+    __slots__ = ('key', 'bits', 'parts', 'svid', 'sats', 'first_seen', 'last_seen', 'count', 'source')
+
+    def __init__(self, key, bits, svid, seen, source=None, count=1):
+        self.key = key          # DCR header bits 8-40
+        self.bits = bits        # first message of the current version
+        self.parts = (bits,)
+        self.svid = svid
+        self.sats = {svid: count}   # svId -> messages received from it
+        self.first_seen = seen
+        self.last_seen = seen
+        self.count = count
+        self.source = source
+
+    def merge(self, bits):
+        # another message with this header -> REPEAT of a part already held
+        # (told apart without decoding it), a new PART, an UPDATE (correction
+        # or cancellation, replaces the parts) or STALE (the older version
+        # it replaced, ignored)
+        payload = dcr_payload(bits)
+        for part in self.parts:
+            if dcr_payload(part) == payload:
+                return REPEAT
+        info_type = dcr_info_type(bits)
+        current = dcr_info_type(self.bits)
+        if info_type == current:
+            self.parts += (bits,)
+            return PART
+        if info_type < current:
+            return STALE
+        self.bits = bits
+        self.parts = (bits,)
+        return UPDATE
+
+    def heard(self, svid, seen, source=None, n=1):
+        self.svid = svid
+        self.sats[svid] = self.sats.get(svid, 0) + n
+        self.last_seen = seen
+        self.count += n
+        self.source = source
+
+
+class RecordTable:
+    def __init__(self, max_rows=None, max_age=None, ttl=None):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.ttl = ttl
+        self.rows = {}
+        # first-seen order when the dict is kept in last-seen order; a plain
+        # dict, re-inserting a key moves it to the end
+        self.order = deque() if max_rows is not None or ttl is not None else None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        if self.order is None:
+            return iter(self.rows.values())
+        rows = self.rows
+        return (record for record in self.order if rows.get(record.key) is record)
+
+    def get(self, key):
+        return self.rows.get(key)
+
+    def add(self, record):
+        old = self.rows.get(record.key)
+        self.rows[record.key] = record
+        if self.order is not None:
+            if old is None:
+                self.order.append(record)
+            else:
+                self.order[self.order.index(old)] = record
+
+    def touch(self, record):
+        # call after updating last_seen
+        if self.order is not None:
+            del self.rows[record.key]
+            self.rows[record.key] = record
+
+    def remove(self, key):
+        del self.rows[key]
+        if self.order is not None and len(self.order) > 2 * len(self.rows) + 64:
+            rows = self.rows
+            self.order = deque(record for record in self.order if rows.get(record.key) is record)
+
+    def evict(self, now=None):
+        # returns the keys of the dropped records
+        now = int(time.time()) if now is None else now
+        evicted = []
+        if self.ttl is not None:
+            while self.rows:
+                record = next(iter(self.rows.values()))
+                if now - record.last_seen <= self.ttl:
+                    break
+                evicted.append(record.key)
+                self.remove(record.key)
+        if self.max_age is not None:
+            while self.rows:
+                record = self.order[0] if self.order is not None else next(iter(self.rows.values()))
+                if self.rows.get(record.key) is not record:
+                    self.order.popleft()
+                    continue
+                if now - record.first_seen <= self.max_age:
+                    break
+                evicted.append(record.key)
+                self.remove(record.key)
+        if self.max_rows is not None:
+            while len(self.rows) > self.max_rows:
+                key = next(iter(self.rows))
+                evicted.append(key)
+                self.remove(key)
+        return evicted
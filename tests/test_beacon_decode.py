@@ -0,0 +1,97 @@
+# beacon_info() against the original string slicing functions on random
+# HEXIDs and every protocol flag/code combination.
+import random
+import pytest
+import beacon_decode
+from beacon_decode import beacon_hexid, beacon_info, beacon_key, beacon_value
+
+
+def legacy_country_decode(beacon, countrydict):
+    t = bin(int(beacon, 16))[2:].zfill(60)
+    t = t[1:11]
+    try:
+        return countrydict[str(int(t,2))]
+    except KeyError:
+        return "UNKNOWN"
+
+def legacy_beacon_type(beacon):
+    t = bin(int(beacon, 16))[2:].zfill(60)
+    if t[0] == '1' :
+        match t[11:14] :
+            case '010' | '110':
+                return 'EPIRB'
+            case '111' :
+                return 'TEST'
+            case '000' :
+                return 'ORB'
+            case '001' :
+                return 'ELT'
+            case '011' :
+                match t[14:17] :
+                    case '000' | '001' | '011':
+                        return 'ELT'
+                    case '010' | '100' :
+                        return 'EPIRB'
+                    case '110' :
+                        return 'PLB'
+                    case _ :
+                        return "UNDEF"
+            case '100' :
+                return 'NUP'
+            case '101' :
+                return 'SGB'
+            case _:
+                return 'UNDEF'
+    else:
+        match t[11:15] :
+            case '0010' | '1010' | '0110':
+                return 'EPIRB'
+            case '0011' | '0100' | '0101' | '1000' | '1001' :
+                return 'ELT'
+            case '0111' | '1011' :
+                return 'PLB'
+            case '1100' :
+                return 'ShipSec'
+            case '1110' | '1111' :
+                return 'TEST'
+            case '1101' :
+                if t[17:21] == '1111':
+                    if t[15:17] == '00': return 'RLS/1st EPIRB'
+                    elif t[15:17] == '01': return 'RLS/2nd EPIRB'
+                    elif t[15:17] == '10': return 'RLS/PLB EPIRB'
+                    else: return 'RLS/TEST EPIRB'
+                else:
+                    if t[15:17] == '00': return 'RLS/ELT'
+                    elif t[15:17] == '01': return 'RLS/EPIRB'
+                    elif t[15:17] == '10': return 'RLS/PLB'
+                    else: return 'RLS/TEST'
+            case _:
+                return 'UNDEF'
+
+def corpus(n=20000):
+    rng = random.Random(0)
+    hexids = [f'{rng.getrandbits(60):015x}' for _ in range(n)]
+    # every protocol flag/code combination at least once
+    return hexids + [f'{(flag << 59) | (code << 39) | rng.getrandbits(39):015x}' for flag in (0, 1) for code in range(1024)]
+
+
+@pytest.fixture(scope='module')
+def countrydict():
+    beacon_decode.load_countries()
+    return {str(code): name for code, name in beacon_decode.countries.items()}
+
+def test_same_as_string_slicing(countrydict):
+    for hexid in corpus():
+        assert beacon_info(hexid) == (legacy_beacon_type(hexid), legacy_country_decode(hexid, countrydict)), hexid
+
+def test_countries_loaded_on_first_lookup(countrydict):
+    hexid = f'{1 << 59 | 227 << 49:015x}'       # country code 227
+    beacon_decode.countries.clear()
+    beacon_info.cache_clear()
+    assert beacon_info(hexid)[1] == countrydict['227'] != 'UNKNOWN'
+
+def test_beacon_value():
+    rng = random.Random(1)
+    for _ in range(1000):
+        key = beacon_key(rng.getrandbits(64))
+        assert beacon_value(key) == int(beacon_hexid(key), 16)
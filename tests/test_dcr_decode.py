@@ -0,0 +1,19 @@
+# dcr_golden.json holds rows produced by the original BitArray decoder for
+# reports of every category; the table-driven decoder must give the same rows.
+import json
+import os
+import pytest
+from dcr_decode import dcr_bits, dcr_key, dcr_msg_types, decode_dcr, format_dcr
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dcr_golden.json'), encoding='utf-8') as f:
+    CASES = json.load(f)
+
+
+@pytest.mark.parametrize('case', CASES, ids=lambda case: case['dwords'][0])
+def test_golden_row(case):
+    bits = dcr_bits(int(d, 16) for d in case['dwords'])
+    assert format_dcr(decode_dcr(bits)) + [dcr_key(bits)] == case['row']
+
+def test_golden_covers_every_category():
+    categories = {decode_dcr(dcr_bits(int(d, 16) for d in case['dwords'])).get('category') for case in CASES}
+    assert set(dcr_msg_types) <= categories
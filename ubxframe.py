@@ -0,0 +1,136 @@
+# Lightweight UBX framer with a pre-filter.
+# Scans the byte stream for sync words, checks length and checksum and looks at
+# class/ID (and for SFRBX the gnssId and the first dword) straight in the raw
+# frame. Only frames the decoder uses are handed to pyubx2 for full parsing;
+# GPS/Galileo navigation subframes and other traffic are skipped unparsed.
+import time
+from functools import partial
+from itertools import accumulate
+from pyubx2 import UBXReader, VALNONE, UBXMessageError, UBXParseError, UBXTypeError
+from dcr_decode import is_dcr_dword
+
+SYNC = b'\xb5\x62'
+RXM_RLM = b'\x02\x59'
+RXM_SFRBX = b'\x02\x13'
+NAV_SAT = b'\x01\x35'
+
+
+def ubx_checksum(data):
+    # 8-bit Fletcher over class..payload; B is the sum of the running sums of A
+    return bytes((sum(data) & 0xFF, sum(accumulate(data)) & 0xFF))
+
+def iter_frames(data, pos=0):
+    # (offset, frame) of every valid frame in a complete buffer (bytes, mmap),
+    # resyncing like UBXFramer but without parsing anything
+    size = len(data)
+    pos = data.find(SYNC, pos)
+    while 0 <= pos <= size - 8:
+        n = (data[pos + 4] | data[pos + 5] << 8) + 8
+        frame = data[pos:pos + n]
+        if len(frame) < n or ubx_checksum(frame[2:-2]) != frame[-2:]:
+            pos = data.find(SYNC, pos + 1)
+            continue
+        yield pos, frame
+        pos = data.find(SYNC, pos + n)
+
+def relevant_frame(frame):
+    msg = frame[2:4]
+    if msg == RXM_SFRBX:
+        # payload: gnssId at 0, dwrd_01 at 8
+        return frame[6] == 5 and len(frame) >= 20 and is_dcr_dword(int.from_bytes(frame[14:18], 'little'))
+    return msg == RXM_RLM or msg == NAV_SAT
+
+
+class UBXFramer:
+    def __init__(self, stream, accept=relevant_frame, chunk=65536, metrics=None):
+        self.stream = stream
+        self.accept = accept
+        self.chunk = chunk
+        self.metrics = metrics
+        self.buf = bytearray()
+        self.consumed = 0       # stream bytes dropped from the front of buf
+        self.offset = 0         # stream offset of the last frame yielded
+        self.arrived = None     # time.monotonic() of the read that completed it
+        self.frames = 0
+        self.passed = 0
+        self.checksum_errors = 0
+        self.parse_errors = 0
+        self.skipped = 0        # bytes outside valid frames
+        self.skipped_counted = 0    # part of it already added to the metrics
+
+    def read(self):
+        if hasattr(self.stream, 'in_waiting'):     # serial port, don't wait for a full chunk
+            return self.stream.read(min(self.chunk, max(1, self.stream.in_waiting)))
+        return self.stream.read(self.chunk)
+
+    def timed_read(self):
+        self.metrics.count('gnss_skipped_bytes_total', n=self.skipped - self.skipped_counted)
+        self.skipped_counted = self.skipped
+        start = time.perf_counter()
+        data = self.read()
+        self.metrics.observe('read', time.perf_counter() - start)
+        return data
+
+    def parse(self, frame):
+        start = time.perf_counter()
+        try:
+            return UBXReader.parse(frame, validate=VALNONE)
+        finally:
+            self.metrics.observe('parse', time.perf_counter() - start)
+
+    def __iter__(self):
+        # yields (raw frame, parsed message) for accepted frames; may be
+        # iterated again after the stream returned no data (serial timeout)
+        buf = self.buf
+        pos = 0
+        metrics = self.metrics
+        read = self.timed_read if metrics else self.read
+        parse = self.parse if metrics else partial(UBXReader.parse, validate=VALNONE)
+        while True:
+            i = buf.find(SYNC, pos)
+            if i < 0:
+                end = len(buf) - 1 if buf.endswith(b'\xb5') else len(buf)
+                self.skipped += end - pos
+                pos = end
+            else:
+                self.skipped += i - pos
+                pos = i
+                if len(buf) - pos >= 8:
+                    n = (buf[pos + 4] | buf[pos + 5] << 8) + 8
+                    if len(buf) - pos >= n:
+                        frame = bytes(buf[pos:pos + n])
+                        if ubx_checksum(frame[2:-2]) != frame[-2:]:
+                            self.checksum_errors += 1
+                            self.skipped += 1
+                            if metrics:
+                                metrics.count('gnss_checksum_errors_total')
+                            pos += 1
+                            continue
+                        self.frames += 1
+                        offset = self.consumed + pos
+                        pos += n
+                        if metrics:
+                            metrics.count('gnss_frames_total', ('msg', frame[2:4].hex()))
+                        if self.accept(frame):
+                            try:
+                                parsed_data = parse(frame)
+                            except (UBXMessageError, UBXParseError, UBXTypeError):
+                                self.parse_errors += 1
+                                if metrics:
+                                    metrics.count('gnss_parse_errors_total')
+                                continue
+                            self.passed += 1
+                            self.offset = offset
+                            yield frame, parsed_data
+                        elif metrics:
+                            metrics.count('gnss_frames_ignored_total')
+                        continue
+            del buf[:pos]
+            self.consumed += pos
+            pos = 0
+            data = read()
+            if not data:
+                return
+            # a RingBuffer knows when its bytes came off the port
+            self.arrived = getattr(self.stream, 'arrived', None) or time.monotonic()
+            buf += data
@@ -0,0 +1,340 @@
+# Compressed, time-indexed capture archive (.ubxz).
+# Only the frames the decoder uses are kept: RXM-RLM, QZSS DC Report
+# subframes and NAV-SAT thinned to one every navsat_sec seconds. They are
+# stored with their receive time in zlib-compressed chunks of up to chunk_sec
+# seconds; every chunk has a header with its time span, frame count and the
+# message types it holds, and a copy of all headers (the index) is written
+# at the end of the file on close. A reader maps the file and decompresses
+# only the chunks that overlap the requested window. A file whose writer died
+# before close() is still readable, the index is rebuilt from the chunk
+# headers, and a writer reopening it continues after the last complete chunk.
+#
+#   file:   MAGIC, chunks..., index, footer
+#   chunk:  CHUNK header, zlib(records...), record = u32 ms after the chunk start + raw UBX frame
+#   index:  INDEX_MAGIC, u32 count, (u64 chunk offset + CHUNK header) per chunk
+#   footer: u64 index offset, FOOTER_MAGIC
+#
+#   python ubxz.py pack capture.ubx ... -o month.ubxz [--start 2026-09-01T00:00]
+#   python ubxz.py unpack month.ubxz -o window.ubx --since 2026-09-14T12:00 --until 2026-09-14T13:00
+#   python ubxz.py info month.ubxz
+import mmap
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_left
+from ubxframe import NAV_SAT, RXM_RLM, iter_frames, relevant_frame
+
+MAGIC = b'UBXZ\x00\x01\r\n'
+CHUNK = struct.Struct('<4sIIIddB')      # magic, compressed size, raw size, frames, first time, last time, types
+CHUNK_MAGIC = b'UBXC'
+INDEX_MAGIC = b'UBXI'
+FOOTER = struct.Struct('<Q4s')
+FOOTER_MAGIC = b'UBXZ'
+RECORD = struct.Struct('<I')
+
+RLM, DCR, NAVSAT = 1, 2, 4          # chunk type bits
+ALL = RLM | DCR | NAVSAT
+CHUNK_SEC = 300
+CHUNK_BYTES = 1 << 20
+NAVSAT_SEC = 60
+
+
+def frame_type(frame):
+    msg = frame[2:4]
+    return RLM if msg == RXM_RLM else NAVSAT if msg == NAV_SAT else DCR
+
+def is_ubxz(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class Chunk:
+    __slots__ = ('offset', 'size', 'raw_size', 'frames', 'first', 'last', 'types')
+
+    def __init__(self, offset, size, raw_size, frames, first, last, types):
+        self.offset = offset    # of the compressed data
+        self.size = size
+        self.raw_size = raw_size
+        self.frames = frames
+        self.first = first
+        self.last = last
+        self.types = types
+
+
+def read_index(data):
+    # -> ([Chunk], end of the last complete chunk), from the index if the
+    # footer is intact, else by walking the chunk headers
+    if len(data) >= len(MAGIC) + FOOTER.size:
+        index, magic = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        if magic == FOOTER_MAGIC and data[index:index + 4] == INDEX_MAGIC:
+            count, = struct.unpack_from('<I', data, index + 4)
+            chunks = []
+            pos = index + 8
+            for i in range(count):
+                offset, = struct.unpack_from('<Q', data, pos)
+                magic, size, raw_size, frames, first, last, types = CHUNK.unpack_from(data, pos + 8)
+                chunks.append(Chunk(offset, size, raw_size, frames, first, last, types))
+                pos += 8 + CHUNK.size
+            return chunks, index
+    chunks = []
+    pos = len(MAGIC)
+    while pos + CHUNK.size <= len(data):
+        magic, size, raw_size, frames, first, last, types = CHUNK.unpack_from(data, pos)
+        if magic != CHUNK_MAGIC or pos + CHUNK.size + size > len(data):
+            break
+        chunks.append(Chunk(pos + CHUNK.size, size, raw_size, frames, first, last, types))
+        pos += CHUNK.size + size
+    return chunks, pos
+
+
+class UBXZWriter:
+    def __init__(self, path, chunk_sec=CHUNK_SEC, chunk_bytes=CHUNK_BYTES, navsat_sec=NAVSAT_SEC):
+        self.chunk_sec = chunk_sec
+        self.chunk_bytes = chunk_bytes
+        self.navsat_sec = navsat_sec
+        self.lock = threading.Lock()
+        self.chunks = []
+        if os.path.exists(path) and os.path.getsize(path):
+            self.file = open(path, 'r+b')
+            if self.file.read(len(MAGIC)) != MAGIC:
+                self.file.close()
+                raise ValueError(f'{path} is not a .ubxz archive')
+            with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                self.chunks, end = read_index(data)
+            self.file.seek(end)
+            self.file.truncate()
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+        self.buf = bytearray()
+        self.frames = 0
+        self.first = self.last = None
+        self.types = 0
+        self.last_navsat = None
+
+    def write(self, frame, t):
+        # frame: one complete UBX frame, t: receive time (epoch seconds); other frames are dropped
+        if not relevant_frame(frame):
+            return
+        kind = frame_type(frame)
+        with self.lock:
+            if self.file.closed:
+                return
+            if kind == NAVSAT:
+                if self.last_navsat is not None and 0 <= t - self.last_navsat < self.navsat_sec:
+                    return
+                self.last_navsat = t
+            if self.first is not None and (t - self.first >= self.chunk_sec or t < self.first
+                                           or len(self.buf) >= self.chunk_bytes):
+                self._flush()
+            if self.first is None:
+                self.first = t
+            self.buf += RECORD.pack(round((t - self.first) * 1000))
+            self.buf += frame
+            self.frames += 1
+            self.last = t
+            self.types |= kind
+
+    def _flush(self):
+        if not self.frames:
+            return
+        data = zlib.compress(self.buf, 9)
+        offset = self.file.tell()
+        self.file.write(CHUNK.pack(CHUNK_MAGIC, len(data), len(self.buf), self.frames, self.first, self.last, self.types))
+        self.file.write(data)
+        self.file.flush()
+        self.chunks.append(Chunk(offset + CHUNK.size, len(data), len(self.buf), self.frames,
+                                 self.first, self.last, self.types))
+        self.buf = bytearray()
+        self.frames = 0
+        self.first = self.last = None
+        self.types = 0
+
+    def flush(self):
+        with self.lock:
+            if not self.file.closed:
+                self._flush()
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self._flush()
+            index = self.file.tell()
+            self.file.write(INDEX_MAGIC + struct.pack('<I', len(self.chunks)))
+            for c in self.chunks:
+                self.file.write(struct.pack('<Q', c.offset))
+                self.file.write(CHUNK.pack(CHUNK_MAGIC, c.size, c.raw_size, c.frames, c.first, c.last, c.types))
+            self.file.write(FOOTER.pack(index, FOOTER_MAGIC))
+            self.file.close()
+
+
+class UBXZReader:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not a .ubxz archive')
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.chunks, end = read_index(self.data)
+        # bisect on the chunk ends when the chunks are in time order (as written live)
+        self.ends = [c.last for c in self.chunks]
+        self.ordered = all(a.last <= b.first for a, b in zip(self.chunks, self.chunks[1:]))
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def select(self, since=None, until=None, types=ALL):
+        # chunks overlapping [since, until) that hold any of the types
+        if since is None or not self.ordered:
+            start = 0
+        else:
+            start = bisect_left(self.ends, since)
+        for c in self.chunks[start:]:
+            if until is not None and c.first >= until:
+                if self.ordered:
+                    break
+                continue
+            if (since is None or c.last >= since) and c.types & types:
+                yield c
+
+    def frames(self, since=None, until=None, types=ALL):
+        # (receive time, raw frame) in [since, until), in file order
+        for c in self.select(since, until, types):
+            raw = zlib.decompress(self.data[c.offset:c.offset + c.size])
+            pos = 0
+            while pos < len(raw):
+                ms, = RECORD.unpack_from(raw, pos)
+                n = (raw[pos + 8] | raw[pos + 9] << 8) + 8
+                t = c.first + ms / 1000
+                if (since is None or t >= since) and (until is None or t < until) and frame_type(raw[pos + 4:pos + 8]) & types:
+                    yield t, raw[pos + 4:pos + 4 + n]
+                pos += 4 + n
+
+    def stream(self, since=None, until=None, types=ALL):
+        return FrameStream(frame for t, frame in self.frames(since, until, types))
+
+    def span(self):
+        return (min(c.first for c in self.chunks), max(c.last for c in self.chunks)) if self.chunks else (None, None)
+
+
+class FrameStream:
+    # read() over the frames of a window, so UBXFramer can decode it like a .ubx file
+    def __init__(self, frames):
+        self.frames = frames
+        self.buf = b''
+
+    def read(self, size=-1):
+        parts = [self.buf]
+        n = len(self.buf)
+        while size < 0 or n < size:
+            frame = next(self.frames, None)
+            if frame is None:
+                break
+            parts.append(frame)
+            n += len(frame)
+        data = b''.join(parts)
+        if size < 0 or n <= size:
+            self.buf = b''
+            return data
+        self.buf = data[size:]
+        return data[:size]
+
+
+def capture_times(data, start=None, end=None):
+    # (time, frame) of the frames of a raw capture; the receiver clock comes
+    # from NAV-SAT iTOW (week rollovers included), anchored at start or, by
+    # default, so that the last frame lands at end (the file modification time)
+    frames = []
+    itow0 = week = prev = None
+    elapsed = 0.0
+    for pos, frame in iter_frames(data):
+        if not relevant_frame(frame):
+            continue
+        if frame[2:4] == NAV_SAT:
+            itow = int.from_bytes(frame[6:10], 'little')
+            if itow0 is None:
+                itow0 = itow
+                week = 0
+            elif itow < prev:
+                week += 1
+            prev = itow
+            elapsed = (itow - itow0) / 1000 + week * 604800
+        frames.append((elapsed, frame))
+    if start is None:
+        start = end - (frames[-1][0] if frames else 0)
+    return [(start + t, frame) for t, frame in frames]
+
+def pack(paths, out, start=None, navsat_sec=NAVSAT_SEC):
+    # raw .ubx captures -> one archive; with start the captures follow each other
+    writer = UBXZWriter(out, navsat_sec=navsat_sec)
+    try:
+        for path in paths:
+            if not os.path.getsize(path):
+                continue
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                frames = capture_times(data, start, os.path.getmtime(path))
+            for t, frame in frames:
+                writer.write(frame, t)
+            if start is not None and frames:
+                start = frames[-1][0] + 1
+    finally:
+        writer.close()
+
+def unpack(path, out, since=None, until=None):
+    # archive window -> raw .ubx for --replay or any UBX tool; returns the number of frames
+    n = 0
+    with UBXZReader(path) as reader, open(out, 'wb') as f:
+        for t, frame in reader.frames(since, until):
+            f.write(frame)
+            n += 1
+    return n
+
+
+if __name__ == '__main__':
+    import argparse
+    from datetime import datetime
+    from logsink import timestamp
+
+    parser = argparse.ArgumentParser(description='compressed, time-indexed UBX capture archive')
+    commands = parser.add_subparsers(dest='command', required=True)
+    p = commands.add_parser('pack', help='keep the RLM/DCR/NAV-SAT frames of .ubx captures in an archive')
+    p.add_argument('captures', nargs='+')
+    p.add_argument('-o', '--out', required=True, help='archive to create or extend')
+    p.add_argument('--start', type=timestamp, help='time of the first frame (ISO), default: file modification time minus the capture span')
+    p.add_argument('--navsat_sec', type=float, default=NAVSAT_SEC, help='keep one NAV-SAT every this many seconds')
+    p = commands.add_parser('unpack', help='write the frames of a time window as raw .ubx')
+    p.add_argument('archive')
+    p.add_argument('-o', '--out', required=True)
+    p.add_argument('--since', type=timestamp, help='ISO date/time')
+    p.add_argument('--until', type=timestamp, help='ISO date/time (exclusive)')
+    p = commands.add_parser('info', help='time span, chunks and size')
+    p.add_argument('archive')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        raw = sum(os.path.getsize(path) for path in args.captures)
+        pack(args.captures, args.out, args.start, args.navsat_sec)
+        size = os.path.getsize(args.out)
+        print(f'{raw / 1e6:.1f} MB of captures -> {size / 1e6:.2f} MB ({raw / max(size, 1):.0f}x smaller)')
+    elif args.command == 'unpack':
+        print(f'{unpack(args.archive, args.out, args.since, args.until)} frames written to {args.out}')
+    else:
+        with UBXZReader(args.archive) as reader:
+            first, last = reader.span()
+            frames = sum(c.frames for c in reader.chunks)
+            raw = sum(c.raw_size for c in reader.chunks)
+            print(f'{len(reader.chunks)} chunks, {frames} frames, {raw / 1e6:.2f} MB uncompressed, '
+                  f'{os.path.getsize(args.archive) / 1e6:.2f} MB on disk')
+            if first is not None:
+                print(f'{datetime.fromtimestamp(first).isoformat(" ", "seconds")} .. '
+                      f'{datetime.fromtimestamp(last).isoformat(" ", "seconds")}')